@@ -1,7 +1,7 @@
 # backend/app/database.py
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # ✅ Read from environment (Docker / Prod safe)
@@ -29,6 +29,37 @@ SessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+def ensure_column(table, column, ddl, bind=engine):
+    """Add a column to an existing table if it is missing.
+
+    create_all() only creates missing tables, so columns added to a model
+    later need this. Safe to run on every start and from several workers.
+    """
+    def missing():
+        return column not in {c["name"] for c in inspect(bind).get_columns(table)}
+
+    if not missing():
+        return
+    try:
+        with bind.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    except Exception:
+        # Another worker added it first
+        if missing():
+            raise
+
+def ensure_index(table, column, bind=engine):
+    """Index a column of an existing table, under the name index=True gives it."""
+    with bind.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+def upgrade_schema(bind=engine):
+    """create_all() plus the columns and indexes added to tables that already existed."""
+    Base.metadata.create_all(bind=bind)
+    ensure_column("proctor_violations", "evidence_key", "VARCHAR(32)", bind)
+    ensure_index("proctor_sessions", "exam_id", bind)
+    ensure_index("proctor_violations", "session_id", bind)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -9,8 +9,16 @@ security = HTTPBearer()
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
+    return decode_access_token(credentials.credentials)
+
+
+def decode_access_token(token: str):
+    """Validate an access token and return the user dict.
+
+    Shared by bearer-auth routes and websockets, which pass the token
+    as a query parameter.
+    """
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
         # Ensure this is an access token, not a refresh token
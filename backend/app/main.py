@@ -1,11 +1,20 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+import json
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from fastapi.middleware.gzip import GZipMiddleware
 
-from app.database import Base, engine
+from app.database import upgrade_schema
 from app import models  # ⬅️ keep only this
 from app.routes import user, exam, question, submission, proctor
+from app.services.frame_analyzer import analyzer
+from app.services.identity import identity
+from app.services.evidence_store import evidence_store
+from app.services.frame_traces import frame_traces
+from app.services.write_buffer import write_buffer
+from app.services.admin_hub import manager
+from app.dependencies import decode_access_token
 
 # =====================================================
 # CREATE APP
@@ -42,7 +51,7 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 # =====================================================
 # DATABASE INIT
 # =====================================================
-Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 # =====================================================
 # ROUTERS
@@ -53,36 +62,68 @@ app.include_router(exam.router)
 app.include_router(question.router)
 app.include_router(submission.router)
 app.include_router(proctor.router)
+app.include_router(proctor.ws_router)
 
 # =====================================================
-# WEBSOCKET MANAGER (ADMIN LIVE MONITORING)
+# STARTUP / SHUTDOWN
 # =====================================================
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+@app.on_event("startup")
+async def start_admin_events():
+    # Every worker ticks the event bus, watched or not, so events it raises
+    # reach admins connected to the other workers
+    manager.start()
+    # Scans the evidence segments on its own thread, not on the first capture
+    evidence_store.start()
+
+@app.on_event("shutdown")
+def shutdown_proctoring():
+    manager.stop()
+    identity.stop()
+    analyzer.shutdown()
+    frame_traces.drain()
+    evidence_store.stop()
+    # Last: anything recorded while the others wound down still gets written
+    write_buffer.stop()
 
-manager = ConnectionManager()
+# =====================================================
+# WEBSOCKET (ADMIN LIVE MONITORING)
+# =====================================================
+# The fan-out hub lives in app.services.admin_hub so the proctor routes can
+# publish to it. Send {"subscribe": [exam ids]} (or null for all exams) at
+# any time to change which exams this socket receives.
+def _parse_exam_ids(value):
+    if value is None or value == "" or value == "all":
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return {int(v) for v in value}
 
 @app.websocket("/ws/admin")
-async def admin_ws(websocket: WebSocket):
-    await manager.connect(websocket)
+async def admin_ws(websocket: WebSocket, token: str = "", exams: str = ""):
+    try:
+        user = decode_access_token(token)
+        exam_ids = _parse_exam_ids(exams)
+    except (HTTPException, ValueError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if user["role"] != "admin":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    connection = await manager.connect(websocket, exam_ids)
     try:
         while True:
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if isinstance(message, dict) and "subscribe" in message:
+                    manager.subscribe(connection, _parse_exam_ids(message["subscribe"]))
+            except (ValueError, TypeError):
+                continue
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        manager.disconnect(connection)
 
 # =====================================================
 # OPTIONS HANDLER (FIXES PREFLIGHT ISSUES)
@@ -3,8 +3,11 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Float,
     ForeignKey,
-    LargeBinary
+    Index,
+    LargeBinary,
+    Text
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -16,7 +19,7 @@ class ProctorSession(Base):
     __tablename__ = "proctor_sessions"
 
     id = Column(Integer, primary_key=True, index=True)
-    exam_id = Column(Integer, nullable=False)
+    exam_id = Column(Integer, nullable=False, index=True)
     user_id = Column(Integer, nullable=False)
 
     # 🔐 FACE IDENTITY VERIFICATION (STEP 8)
@@ -40,7 +43,8 @@ class ProctorViolation(Base):
     session_id = Column(
         Integer,
         ForeignKey("proctor_sessions.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     # Violation types:
@@ -52,4 +56,106 @@ class ProctorViolation(Base):
 
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    # Key of the frame thumbnail in app.services.evidence_store, for the
+    # violation types that keep one
+    evidence_key = Column(String(32), nullable=True)
+
     session = relationship("ProctorSession", back_populates="violations")
+
+
+# ===================== PROCTOR VIOLATION SUMMARY =====================
+class ProctorViolationSummary(Base):
+    __tablename__ = "proctor_violation_summaries"
+
+    # Raw violations of old sessions rolled up per type by
+    # app.services.retention; the raw rows are archived to disk
+    session_id = Column(
+        Integer,
+        ForeignKey("proctor_sessions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    violation_type = Column(String, primary_key=True)
+
+    count = Column(Integer, nullable=False)
+    first_at = Column(DateTime, nullable=True)
+    last_at = Column(DateTime, nullable=True)
+
+    # JSON object: minutes after first_at -> violations in that minute
+    minute_histogram = Column(Text, nullable=False, default="{}")
+
+
+# ===================== PROCTOR SESSION SCORE =====================
+class ProctorSessionScore(Base):
+    __tablename__ = "proctor_session_scores"
+
+    # Running aggregates of a session's violations, kept in step with
+    # proctor_violations so scoring never re-reads every row
+    session_id = Column(
+        Integer,
+        ForeignKey("proctor_sessions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    penalty_total = Column(Integer, nullable=False, default=0)
+    violation_count = Column(Integer, nullable=False, default=0)
+
+    # JSON object: violation type -> count
+    type_counts = Column(Text, nullable=False, default="{}")
+
+
+# ===================== PROCTOR EVENT =====================
+class ProctorEvent(Base):
+    __tablename__ = "proctor_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    session_id = Column(Integer, nullable=True, index=True)
+
+    # Browser-side signal, e.g. TAB_SWITCH, WINDOW_BLUR, RIGHT_CLICK
+    event_type = Column(String, nullable=False)
+
+    # Raw JSON body as sent by the browser
+    payload = Column(Text, nullable=True)
+
+    # Client sequence number within the session; retried batches are
+    # de-duplicated on it. NULL for legacy single-event posts
+    seq = Column(Integer, nullable=True)
+
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_proctor_events_session_seq", "session_id", "seq"),
+    )
+
+
+# ===================== PROCTOR FRAME TRACE =====================
+class ProctorFrameTrace(Base):
+    __tablename__ = "proctor_frame_traces"
+
+    # A chunk of a session's per-frame metrics, replayed offline by
+    # app.services.replay to tune the violation thresholds
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(
+        Integer,
+        ForeignKey("proctor_sessions.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # Unix time of the chunk's first frame
+    started_at = Column(Float, nullable=False)
+    frames = Column(Integer, nullable=False)
+
+    # Packed app.services.frame_traces.TRACE_DTYPE records
+    data = Column(LargeBinary, nullable=False)
+
+
+# ===================== PROCTOR EXAM CONFIG =====================
+class ProctorExamConfig(Base):
+    __tablename__ = "proctor_exam_configs"
+
+    exam_id = Column(Integer, primary_key=True)
+
+    # Comma-separated analysis stages, in run order
+    # (brightness, motion, blur, faces); a quiz can run only the cheap ones
+    stages = Column(String, nullable=False)
@@ -1,82 +1,88 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import (
+    APIRouter, Depends, UploadFile, File, Form, HTTPException,
+    WebSocket, WebSocketDisconnect, status,
+)
+from fastapi.responses import Response
+import asyncio
+import json
 import os
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
-from collections import defaultdict
-import cv2
-import numpy as np
 import time
+from datetime import datetime
 
-from app.database import get_db
-from app.dependencies import get_current_user
-from app import models_proctor
+from app.database import get_db, SessionLocal
+from app.dependencies import get_current_user, decode_access_token
+from app import models_proctor, schemas
+from app.services.frame_analyzer import (
+    analyzer, AnalyzerBusy, DEFAULT_STAGES, parse_stages, stage_stats,
+)
+from app.services.frame_batcher import batcher
+from app.services.face_tracker import tracker
+from app.services.session_store import sessions
+from app.services.session_owners import SessionOwner, session_owners
+from app.services.state_backend import state_backend
+from app.services.frame_pacer import session_risk, next_interval_ms
+from app.services.frame_rules import apply_frame_rules
+from app.services.frame_traces import frame_traces
+from app.services.motion_arena import arena
+from app.services.frame_cache import frame_cache
+from app.services.identity import identity
+from app.services.face_index import face_index
+from app.services.evidence_store import EVIDENCE_TYPES, evidence_store
+from app.services.write_buffer import write_buffer
+from app.services.scoring import penalty, summarize
+from app.services.live_stats import live_stats
+from app.services.admin_hub import manager
+from app.services.face_utils import embedding_to_bytes, embedding_from_bytes
 
 router = APIRouter(prefix="/proctor", tags=["Proctoring"])
+ws_router = APIRouter(tags=["Proctoring"])
 
 # Feature flag to disable server-side proctoring for lightweight deployments
 PROCTOR_ENABLED = os.getenv("PROCTOR_ENABLED", "1") == "1"
 
 # ===================== STATE =====================
-proctor_state = defaultdict(lambda: {
-    "no_face_since": None,
-    "multi_face_count": 0,
-    "dark_frame_count": 0,
-    "low_motion_streak": 0,
-    "blur_streak": 0,
-    "total_violations": 0
-})
-
-last_frame_time = defaultdict(lambda: 0)
-previous_frames = {}
-
-face_cascade = cv2.CascadeClassifier(
-    cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-)
-
-# ===================== CONFIDENCE SCORE CONFIG =====================
-VIOLATION_PENALTY = {
-    "TAB_SWITCH": 5,
-    "WINDOW_BLUR": 5,
-    "RIGHT_CLICK": 5,
-    "LEFT_SEAT": 15,
-    "MULTIPLE_FACES": 20,
-    "CAMERA_COVERED": 20,
-    "SPOOF_ATTACK": 30,
-}
-
-# ===================== IMAGE METRICS =====================
-def _brightness(img):
-    return float(img.mean())
-
-
-def _motion_score(session_id, gray):
-    prev = previous_frames.get(session_id)
-    previous_frames[session_id] = gray
-    if prev is None:
-        return 255.0
-    diff = cv2.absdiff(prev, gray)
-    return float(diff.mean())
-
-
-def _blur_score(gray):
-    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
-
-
-def detect_spoof(session_id, gray, state):
-    motion = _motion_score(session_id, gray)
-    blur = _blur_score(gray)
-
-    # Low motion or very blurry frames over consecutive checks indicate static replay
-    if motion < 0.5:
-        state["low_motion_streak"] += 1
-    else:
-        state["low_motion_streak"] = 0
-
-    if blur < 15:
-        state["blur_streak"] += 1
-    else:
-        state["blur_streak"] = 0
+# Streak counters and last frame time live in a pluggable state backend
+# (app.services.state_backend), in-process or shared between workers.
+# Per-worker resources sit in the local TTL/LRU store; the tracker, the
+# motion arena, the frame cache, identity references and open frame traces
+# follow its evictions.
+def _session_closed(session_id):
+    exam_id = live_stats.exam_of(session_id)
+    live_stats.session_ended(session_id)
+    if exam_id is not None:
+        manager.publish({"type": "session_end", "exam_id": exam_id, "session_id": session_id})
+
+
+sessions.on_evict(tracker.forget)
+sessions.on_evict(arena.release)
+sessions.on_evict(frame_cache.forget)
+sessions.on_evict(identity.forget)
+sessions.on_evict(frame_traces.forget)
+sessions.on_evict(_session_closed)
+
+# ===================== PER-EXAM STAGES =====================
+# exam_id -> (stages, loaded_at); re-read after a minute so edits made on
+# another worker are picked up
+_exam_stages = {}
+EXAM_STAGES_TTL = 60
+
+
+def exam_stages(db, exam_id):
+    cached = _exam_stages.get(exam_id)
+    now = time.time()
+    if cached and now - cached[1] < EXAM_STAGES_TTL:
+        return cached[0]
 
-    return state["low_motion_streak"] >= 5 or state["blur_streak"] >= 5
+    config = db.query(models_proctor.ProctorExamConfig).filter(
+        models_proctor.ProctorExamConfig.exam_id == exam_id
+    ).first()
+    # An empty list (stored before it was rejected) means the defaults, as
+    # it does further down the analyzer
+    stages = (parse_stages(config.stages) if config else ()) or DEFAULT_STAGES
+    _exam_stages[exam_id] = (stages, now)
+    return stages
 
 
 # ===================== START SESSION =====================
@@ -93,112 +99,319 @@ async def start_proctor_session(
     if not data:
         raise HTTPException(400, "Empty frame")
 
-    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
-    if img is None:
+    try:
+        metrics = await analyzer.analyze(data, embed=identity.enabled)
+    except AnalyzerBusy:
+        raise HTTPException(503, "Proctoring is busy, please retry in a moment")
+    if metrics is None:
         raise HTTPException(400, "Invalid image")
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3, minSize=(30, 30))
-
-    if len(faces) == 0:
+    if metrics["faces"] == 0:
         raise HTTPException(400, "Face not detected. Please ensure your face is visible and the room is well-lit.")
 
+    # Reference for later identity checks; None if the face couldn't be encoded
+    embedding = metrics.get("embedding")
+
     session = models_proctor.ProctorSession(
         exam_id=exam_id,
         user_id=user["user_id"],
+        face_embedding=embedding_to_bytes(embedding) if embedding is not None else None,
     )
 
     db.add(session)
+    db.flush()
+    db.add(models_proctor.ProctorSessionScore(
+        session_id=session.id, penalty_total=0, violation_count=0, type_counts="{}"
+    ))
     db.commit()
     db.refresh(session)
 
-    proctor_state.pop(session.id, None)
-    previous_frames.pop(session.id, None)
-    last_frame_time.pop(session.id, None)
+    await state_backend.end_async(session.id)
+    session_owners.put(session.id, SessionOwner(user["user_id"], exam_id, session.started_at))
+    identity.set_reference(session.id, embedding)
+    live_stats.session_started(exam_id, session.id, user["user_id"])
+    manager.publish({
+        "type": "session_start", "exam_id": exam_id,
+        "session_id": session.id, "user_id": user["user_id"],
+    })
+
+    if embedding is not None and identity.enabled:
+        await _check_duplicate(db, exam_id, session.id, user["user_id"], embedding)
 
     return {"session_id": session.id}
 
 
-# ===================== ANALYZE FRAME =====================
-@router.post("/frame")
-async def analyze_frame(
-    session_id: int = Form(...),
-    frame: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    user: dict = Depends(get_current_user),
-):
-    if not PROCTOR_ENABLED:
-        raise HTTPException(501, "Proctoring disabled on this deployment")
+async def _check_duplicate(db, exam_id, session_id, user_id, embedding):
+    """Flag a start whose face already sat this exam under another account."""
+    index = face_index.index(exam_id)
+    rows = db.query(
+        models_proctor.ProctorSession.id,
+        models_proctor.ProctorSession.user_id,
+        models_proctor.ProctorSession.face_embedding,
+    ).filter(
+        models_proctor.ProctorSession.exam_id == exam_id,
+        models_proctor.ProctorSession.id > index.watermark,
+        models_proctor.ProctorSession.id != session_id,
+        models_proctor.ProctorSession.face_embedding != None,
+    ).all()
+    face_index.catch_up(exam_id, (
+        (sid, uid, embedding_from_bytes(blob)) for sid, uid, blob in rows
+    ))
+
+    match = face_index.check_and_add(exam_id, session_id, user_id, embedding)
+    if match is None:
+        return
+
+    def bump(entry):
+        entry["state"]["total_violations"] += 1
+        entry["state"]["last_violation_at"] = time.time()
+
+    await state_backend.update_async(session_id, bump)
+    _record_violation(session_id, "DUPLICATE_CANDIDATE")
+
+
+def _owned_session(db, session_id, user_id):
+    """Owner of one of the caller's sessions, or None.
+
+    Served from the in-process ownership cache; the database is read only
+    on a miss.
+    """
+    owner = session_owners.lookup(db, session_id)
+    if owner is None or owner.user_id != user_id:
+        return None
+    return owner
+
+
+def _analyzer_load():
+    return analyzer.pending / max(1, analyzer.queue_depth)
+
+
+def _claim_frame(entry, now):
+    """Rate-limit a session to one analyzed frame every 2 seconds."""
+    state = entry["state"]
+    claim = {
+        "skip": now - entry["last_frame_time"] < 2,
+        "risk": session_risk(state, now),
+        "multi_face": state["multi_face_count"] > 0,
+    }
+    if not claim["skip"]:
+        entry["last_frame_time"] = now
+    return claim
+
+
+def _load_reference(db, session_id):
+    """Identity reference after a restart, an eviction or on another worker."""
     session = db.query(models_proctor.ProctorSession).filter(
-        models_proctor.ProctorSession.id == session_id,
-        models_proctor.ProctorSession.user_id == user["user_id"]
+        models_proctor.ProctorSession.id == session_id
     ).first()
+    blob = session.face_embedding if session else None
+    identity.set_reference(session_id, embedding_from_bytes(blob) if blob else None)
 
-    if not session:
-        raise HTTPException(404, "Invalid session")
 
-    now = time.time()
-    if now - last_frame_time[session_id] < 2:
-        return {"status": "SKIPPED"}
-    last_frame_time[session_id] = now
+async def _record_impersonation(session_id, distance):
+    def bump(entry):
+        entry["state"]["total_violations"] += 1
+        entry["state"]["last_violation_at"] = time.time()
 
-    data = await frame.read()
-    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
-    if img is None:
-        return {"violation": "INVALID_FRAME"}
+    await state_backend.update_async(session_id, bump)
+    _record_violation(session_id, "IMPERSONATION")
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3, minSize=(30, 30))
-    faces_count = len(faces)
 
-    state = proctor_state[session_id]
-    violation = None
+identity.on_mismatch = _record_impersonation
 
-    brightness = _brightness(img)
-    if brightness < 10:
-        state["dark_frame_count"] += 1
-        if state["dark_frame_count"] >= 5:
-            violation = "CAMERA_COVERED"
-    else:
-        state["dark_frame_count"] = 0
-
-    # No face
-    if faces_count == 0:
-        if state["no_face_since"] is None:
-            state["no_face_since"] = now
-        elif now - state["no_face_since"] >= 15:
-            violation = "LEFT_SEAT"
-    else:
-        state["no_face_since"] = None
 
-    # Multiple faces
-    if faces_count > 1:
-        state["multi_face_count"] += 1
-        if state["multi_face_count"] >= 4:
-            violation = "MULTIPLE_FACES"
-    else:
-        state["multi_face_count"] = 0
+def _record_violation(session_id, violation_type, timestamp=None, evidence_key=None):
+    write_buffer.add_violation(session_id, violation_type, timestamp, evidence_key)
+    live_stats.violation(session_id, violation_type)
+    manager.publish({
+        "type": "violation", "exam_id": live_stats.exam_of(session_id),
+        "session_id": session_id, "violation_type": violation_type,
+    })
+
+
+def _track_live(db, session_id, exam_id, now):
+    if live_stats.known(session_id):
+        live_stats.touch(session_id, now)
+        return
+    # Started before this process came up: seed from the stored aggregates
+    row = db.query(
+        models_proctor.ProctorSession.user_id, models_proctor.ProctorSessionScore.penalty_total
+    ).outerjoin(
+        models_proctor.ProctorSessionScore,
+        models_proctor.ProctorSessionScore.session_id == models_proctor.ProctorSession.id
+    ).filter(models_proctor.ProctorSession.id == session_id).first()
+    if row:
+        live_stats.session_started(exam_id, session_id, row.user_id, row.penalty_total or 0, now)
+
+
+def _skipped(risk, load):
+    return {"status": "SKIPPED", "next_interval_ms": next_interval_ms(risk, load)}
+
+
+async def process_frame(session_id, exam_id, data, db):
+    """Analyze one frame for an already-authorized session.
+
+    Shared by the HTTP endpoint and the websocket so both give identical verdicts.
+    """
+    now = time.time()
+    claim = await state_backend.update_async(session_id, lambda entry: _claim_frame(entry, now), now)
+    if claim["skip"]:
+        return _skipped(claim["risk"], _analyzer_load())
+
+    _track_live(db, session_id, exam_id, now)
+
+    # A multi-face streak must see every face, so it always gets a full scan
+    track_box = tracker.hint(session_id, force_full=claim["multi_face"])
+
+    embed = False
+    if identity.enabled:
+        if identity.has_reference(session_id) is None:
+            _load_reference(db, session_id)
+        embed = identity.due(session_id, now)
+
+    try:
+        metrics = await batcher.analyze(
+            data,
+            motion_slot=arena.slot(session_id),
+            track_box=track_box,
+            cache=frame_cache.session(session_id),
+            stages=exam_stages(db, exam_id),
+            embed=embed,
+        )
+    except AnalyzerBusy:
+        # Queue full: back off as far as this session's risk allows
+        return _skipped(claim["risk"], 1.0)
+    if metrics is None:
+        return {"violation": "INVALID_FRAME"}
 
-    # Spoof detection using motion + blur streaks
-    if detect_spoof(session_id, gray, state):
-        violation = "SPOOF_ATTACK"
-        state["total_violations"] += 2
+    tracker.update(session_id, metrics)
+    stage_stats.record(metrics)
+    frame_traces.record(session_id, now, metrics)
+    if metrics.get("embedding") is not None:
+        # Compared with the reference on the verifier's next batched tick
+        identity.submit(session_id, metrics["embedding"], now)
+
+    violation, total_violations, risk = await state_backend.update_async(
+        session_id,
+        lambda entry: (
+            apply_frame_rules(entry["state"], metrics, now),
+            entry["state"]["total_violations"],
+            session_risk(entry["state"], now),
+        ),
+        now,
+    )
 
     if violation:
-        state["total_violations"] += 1
-        db.add(models_proctor.ProctorViolation(
-            session_id=session.id,
-            violation_type=violation
-        ))
-        db.commit()
+        # Queued, not committed here: a hall of cameras going dark together
+        # becomes a few bulk inserts instead of a commit per frame. The
+        # evidence thumbnail is encoded and written on its own thread.
+        evidence_key = evidence_store.capture(data, now) if violation in EVIDENCE_TYPES else None
+        _record_violation(session_id, violation, evidence_key=evidence_key)
+    elif identity.take_notice(session_id):
+        # Already recorded by the verifier; only surfaced to the candidate here
+        violation = "IMPERSONATION"
 
     return {
-        "faces_detected": faces_count,
+        "faces_detected": metrics["faces"],
         "violation": violation,
-        "total_violations": state["total_violations"]
+        "total_violations": total_violations,
+        "next_interval_ms": next_interval_ms(risk, _analyzer_load()),
     }
 
 
+# ===================== ANALYZE FRAME =====================
+@router.post("/frame")
+async def analyze_frame(
+    session_id: int = Form(...),
+    frame: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    if not PROCTOR_ENABLED:
+        raise HTTPException(501, "Proctoring disabled on this deployment")
+    # A cache hit means a frame inside the 2 s window is skipped without
+    # ever reaching the database
+    owner = _owned_session(db, session_id, user["user_id"])
+    if owner is None:
+        raise HTTPException(404, "Invalid session")
+
+    data = await frame.read()
+    if not data:
+        raise HTTPException(400, "Empty frame")
+    return await process_frame(session_id, owner.exam_id, data, db)
+
+
+# ===================== FRAME STREAM (WEBSOCKET) =====================
+@ws_router.websocket("/ws/proctor/{session_id}")
+async def proctor_stream(websocket: WebSocket, session_id: int, token: str = ""):
+    """Binary JPEG frames in, verdicts out.
+
+    Auth and the session lookup happen once per connection. Only the newest
+    unanalyzed frame is kept: frames arriving while the analyzer is busy
+    replace the pending one instead of queueing behind it. Database sessions
+    are opened per use, so an open socket never pins a pooled connection.
+    """
+    if not PROCTOR_ENABLED:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        user = decode_access_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    with SessionLocal() as db:
+        owner = _owned_session(db, session_id, user["user_id"])
+    if owner is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    try:
+        await websocket.accept()
+
+        latest = {"data": None, "dropped": 0}
+        ready = asyncio.Event()
+
+        async def receive_frames():
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                # Frames are binary; stray text messages are ignored
+                data = message.get("bytes")
+                if not data:
+                    continue
+                if latest["data"] is not None:
+                    latest["dropped"] += 1
+                latest["data"] = data
+                ready.set()
+
+        receiver = asyncio.create_task(receive_frames())
+        try:
+            while True:
+                ready_wait = asyncio.create_task(ready.wait())
+                done, _ = await asyncio.wait(
+                    {receiver, ready_wait}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if receiver in done:
+                    ready_wait.cancel()
+                    receiver.result()  # re-raises WebSocketDisconnect
+
+                ready.clear()
+                data, latest["data"] = latest["data"], None
+                if data is None:
+                    continue
+
+                with SessionLocal() as db:
+                    result = await process_frame(session_id, owner.exam_id, data, db)
+                result["dropped_frames"] = latest["dropped"]
+                await websocket.send_json(result)
+        finally:
+            receiver.cancel()
+    except WebSocketDisconnect:
+        pass
+
+
 # ===================== CONFIDENCE SCORE ENDPOINT =====================
 @router.get("/confidence/{exam_id}")
 def get_proctor_confidence(
@@ -214,67 +427,351 @@ def get_proctor_confidence(
     if not session:
         raise HTTPException(404, "Proctor session not found")
 
-    violations = db.query(models_proctor.ProctorViolation).filter(
-        models_proctor.ProctorViolation.session_id == session.id
-    ).all()
-
-    score = 100
-    breakdown = []
-
-    for v in violations:
-        penalty = VIOLATION_PENALTY.get(v.violation_type, 5)
-        score -= penalty
-        breakdown.append({
-            "type": v.violation_type,
-            "penalty": penalty
-        })
+    # Materialized aggregates plus whatever is still queued: O(1) in the
+    # number of violations
+    with write_buffer.consistent_read():
+        score = db.query(models_proctor.ProctorSessionScore).filter(
+            models_proctor.ProctorSessionScore.session_id == session.id
+        ).first()
+        pending = [t for _, t in write_buffer.pending_violations([session.id])]
 
-    score = max(0, min(100, score))
+    summary = summarize(score, pending)
+    breakdown = [
+        {"type": violation_type, "count": n, "penalty": penalty(violation_type) * n}
+        for violation_type, n in summary["violation_counts"].items()
+    ]
 
     return {
-        "confidence_score": score,
-        "total_violations": len(violations),
+        "confidence_score": summary["confidence_score"],
+        "total_violations": summary["total_violations"],
         "violations": breakdown
     }
 
+REPORT_SORTS = ("confidence", "session")
+REPORT_MAX_LIMIT = 500
+
+
 @router.get("/admin/report/{exam_id}")
 def admin_exam_report(
     exam_id: int,
+    limit: int = 50,
+    after: str = None,
+    sort: str = "confidence",
+    min_violations: int = 0,
     db: Session = Depends(get_db),
     user: dict = Depends(get_current_user),
 ):
+    """One page of an exam's sessions with their scores.
+
+    sort=confidence lists the riskiest candidates first; sort=session lists
+    in start order. Pass the returned next_cursor as `after` for the next
+    page. Sorting and filtering use the stored aggregates, so violations
+    still queued for writing show in the scores but not in the order.
+    """
     if user["role"] != "admin":
         raise HTTPException(403, "Admin only")
+    if sort not in REPORT_SORTS:
+        raise HTTPException(400, f"sort must be one of {', '.join(REPORT_SORTS)}")
+    limit = max(1, min(limit, REPORT_MAX_LIMIT))
+
+    Score = models_proctor.ProctorSessionScore
+    ProctorSession = models_proctor.ProctorSession
+    penalty_total = func.coalesce(Score.penalty_total, 0)
+
+    query = db.query(ProctorSession, Score).outerjoin(
+        Score, Score.session_id == ProctorSession.id
+    ).filter(ProctorSession.exam_id == exam_id)
+
+    if min_violations > 0:
+        query = query.filter(Score.violation_count >= min_violations)
+
+    # Keyset pagination: the cursor is the sort key of the last row sent
+    try:
+        if sort == "confidence":
+            if after:
+                last_penalty, last_id = (int(part) for part in after.split(":"))
+                query = query.filter(or_(
+                    penalty_total < last_penalty,
+                    and_(penalty_total == last_penalty, ProctorSession.id > last_id),
+                ))
+            query = query.order_by(penalty_total.desc(), ProctorSession.id)
+        else:
+            if after:
+                query = query.filter(ProctorSession.id > int(after))
+            query = query.order_by(ProctorSession.id)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+    with write_buffer.consistent_read():
+        rows = query.limit(limit + 1).all()
+        pending = {}
+        for session_id, violation_type in write_buffer.pending_violations(s.id for s, _ in rows):
+            pending.setdefault(session_id, []).append(violation_type)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_score = rows[-1]
+        if sort == "confidence":
+            next_cursor = f"{last_score.penalty_total if last_score else 0}:{last.id}"
+        else:
+            next_cursor = str(last.id)
 
-    sessions = db.query(models_proctor.ProctorSession).filter(
-        models_proctor.ProctorSession.exam_id == exam_id
-    ).all()
+    return {
+        "exam_id": exam_id,
+        "sessions": [
+            {
+                "session_id": session.id,
+                "user_id": session.user_id,
+                **summarize(score, pending.get(session.id, ())),
+            }
+            for session, score in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+# ===================== END SESSION =====================
+@router.post("/end")
+def end_proctor_session(
+    session_id: int = Form(...),
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    if _owned_session(db, session_id, user["user_id"]) is None:
+        raise HTTPException(404, "Invalid session")
+
+    state_backend.end(session_id)
+    session_owners.invalidate(session_id)
+    return {"status": "ended"}
+
+
+# ===================== EVIDENCE (ADMIN) =====================
+@router.get("/admin/evidence/{violation_id}")
+def get_violation_evidence(
+    violation_id: int,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    """Thumbnail of the frame that raised a violation, served straight from the segment mapping."""
+    if user["role"] != "admin":
+        raise HTTPException(403, "Admin only")
+
+    row = db.query(models_proctor.ProctorViolation.evidence_key).filter(
+        models_proctor.ProctorViolation.id == violation_id
+    ).first()
+    if not row or not row.evidence_key:
+        raise HTTPException(404, "No evidence for this violation")
+
+    thumb = evidence_store.read(row.evidence_key)
+    if thumb is None:
+        raise HTTPException(404, "Evidence expired or not yet written")
+    # Content-addressed, so a key's bytes never change
+    return Response(
+        content=thumb,
+        media_type="image/jpeg",
+        headers={"Cache-Control": "private, max-age=86400", "ETag": f'"{row.evidence_key}"'},
+    )
+
+
+# ===================== STAGE CONFIG (ADMIN) =====================
+@router.get("/admin/stages/{exam_id}")
+def get_exam_stages(
+    exam_id: int,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["role"] != "admin":
+        raise HTTPException(403, "Admin only")
+
+    return {"exam_id": exam_id, "stages": list(exam_stages(db, exam_id))}
 
-    report = []
 
-    for session in sessions:
-        violations = db.query(models_proctor.ProctorViolation).filter(
-            models_proctor.ProctorViolation.session_id == session.id
-        ).all()
+@router.put("/admin/stages/{exam_id}")
+def set_exam_stages(
+    exam_id: int,
+    payload: schemas.ProctorStagesUpdate,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["role"] != "admin":
+        raise HTTPException(403, "Admin only")
+
+    try:
+        stages = parse_stages(payload.stages)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not stages:
+        raise HTTPException(400, "At least one proctor stage is required")
+
+    config = db.query(models_proctor.ProctorExamConfig).filter(
+        models_proctor.ProctorExamConfig.exam_id == exam_id
+    ).first()
+    if config:
+        config.stages = ",".join(stages)
+    else:
+        db.add(models_proctor.ProctorExamConfig(exam_id=exam_id, stages=",".join(stages)))
+    db.commit()
+
+    _exam_stages.pop(exam_id, None)
+    return {"exam_id": exam_id, "stages": list(stages)}
+
+
+# ===================== LIVE DASHBOARD (ADMIN) =====================
+@router.get("/admin/dashboard")
+def proctor_dashboard(
+    since: int = None,
+    user: dict = Depends(get_current_user),
+):
+    """Live per-exam stats; with `since`, only exams changed after that version."""
+    if user["role"] != "admin":
+        raise HTTPException(403, "Admin only")
 
-        score = 100
-        for v in violations:
-            score -= VIOLATION_PENALTY.get(v.violation_type, 5)
+    return live_stats.snapshot(since)
 
-        score = max(0, min(100, score))
 
-        report.append({
-            "user_id": session.user_id,
-            "confidence_score": score,
-            "total_violations": len(violations),
-            "violations": [v.violation_type for v in violations],
-        })
+# ===================== RUNTIME STATS =====================
+@router.get("/admin/stats")
+def proctor_stats(user: dict = Depends(get_current_user)):
+    if user["role"] != "admin":
+        raise HTTPException(403, "Admin only")
 
-    return report
+    return {
+        "analyzer": analyzer.stats(),
+        "batcher": batcher.stats(),
+        "tracker": tracker.stats(),
+        "state": state_backend.stats(),
+        "motion_arena": arena.stats(),
+        "frame_cache": frame_cache.stats(),
+        "stages": stage_stats.stats(),
+        "identity": identity.stats(),
+        "face_index": face_index.stats(),
+        "write_buffer": write_buffer.stats(),
+        "evidence": evidence_store.stats(),
+        "session_owners": session_owners.stats(),
+        "frame_traces": frame_traces.stats(),
+        "live_stats": live_stats.stats(),
+        "admin_hub": manager.stats(),
+    }
 
 
 # ===================== LOG EVENTS =====================
+# Browser-side signals a client may report. The ones priced in
+# VIOLATION_PENALTY become violations; server-detected types never come
+# from the client.
+CLIENT_EVENT_TYPES = {"TAB_SWITCH", "WINDOW_BLUR", "RIGHT_CLICK", "COPY_PASTE", "FULLSCREEN_EXIT"}
+CLIENT_VIOLATION_TYPES = {"TAB_SWITCH", "WINDOW_BLUR", "RIGHT_CLICK"}
+# Client timestamps older than this (seconds) are clamped
+MAX_EVENT_AGE = 3600
+
+
+def _event_floor(db, session_id):
+    """Highest sequence number already stored or queued for the session."""
+    with write_buffer.consistent_read():
+        stored = db.query(func.max(models_proctor.ProctorEvent.seq)).filter(
+            models_proctor.ProctorEvent.session_id == session_id
+        ).scalar()
+        return max(stored or 0, write_buffer.pending_event_seq(session_id))
+
+
+def _accept_events(entry, events, floor, now):
+    """Keep events above the session's sequence high-water mark.
+
+    Returns the new events, or None when the mark is unknown (fresh entry)
+    and has to be loaded from the database first.
+    """
+    last_seq = entry.get("event_seq", floor)
+    if last_seq is None:
+        return None
+
+    fresh = {}
+    for event in events:
+        if event.seq > last_seq:
+            fresh.setdefault(event.seq, event)
+    fresh = [fresh[seq] for seq in sorted(fresh)]
+    if fresh:
+        entry["event_seq"] = fresh[-1].seq
+
+    violations = sum(1 for event in fresh if event.type in CLIENT_VIOLATION_TYPES)
+    if violations:
+        entry["state"]["total_violations"] += violations
+        entry["state"]["last_violation_at"] = now
+    return fresh
+
+
+def _client_time(at_ms, now):
+    if at_ms is None:
+        return datetime.utcfromtimestamp(now)
+    return datetime.utcfromtimestamp(min(now, max(now - MAX_EVENT_AGE, at_ms / 1000.0)))
+
+
+@router.post("/events")
+def record_events(
+    payload: schemas.ProctorEventBatch,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    """Store a batch of browser events in one call.
+
+    Sequence numbers increase per session and the client sends batches in
+    order, retrying a batch until it is acknowledged; anything at or below
+    the session's high-water mark is a retry and is skipped.
+    """
+    if _owned_session(db, payload.session_id, user["user_id"]) is None:
+        raise HTTPException(404, "Invalid session")
+    session_id = payload.session_id
+
+    unknown = {event.type for event in payload.events} - CLIENT_EVENT_TYPES
+    if unknown:
+        raise HTTPException(400, f"Unknown event types: {', '.join(sorted(unknown))}")
+
+    now = time.time()
+    fresh = state_backend.update(
+        session_id, lambda entry: _accept_events(entry, payload.events, None, now), now
+    )
+    if fresh is None:
+        floor = _event_floor(db, session_id)
+        fresh = state_backend.update(
+            session_id, lambda entry: _accept_events(entry, payload.events, floor, now), now
+        )
+
+    for event in fresh:
+        timestamp = _client_time(event.at, now)
+        write_buffer.add_event(
+            user_id=user["user_id"],
+            session_id=session_id,
+            event_type=event.type,
+            payload=json.dumps(event.detail) if event.detail else None,
+            timestamp=timestamp,
+            seq=event.seq,
+        )
+        if event.type in CLIENT_VIOLATION_TYPES:
+            _record_violation(session_id, event.type, timestamp)
+
+    return {
+        "accepted": len(fresh),
+        "duplicates": len(payload.events) - len(fresh),
+        # Everything up to here is stored; the client can drop it
+        "acked_seq": max((event.seq for event in payload.events), default=None),
+    }
+
+
 @router.post("/event")
-def record_event(payload: dict, user=Depends(get_current_user)):
-    print("PROCTOR EVENT:", payload)
+def record_event(payload: dict, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    raw_id = payload.get("session_id")
+    if isinstance(raw_id, bool) or not isinstance(raw_id, (int, str)):
+        raise HTTPException(400, "Invalid session_id")
+    try:
+        session_id = int(raw_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid session_id")
+    if _owned_session(db, session_id, user["user_id"]) is None:
+        raise HTTPException(404, "Invalid session")
+
+    write_buffer.add_event(
+        user_id=user["user_id"],
+        session_id=session_id,
+        event_type=str(payload.get("type") or payload.get("event_type") or "UNKNOWN"),
+        payload=json.dumps(payload),
+    )
     return {"status": "logged"}
@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 
 # ================= USERS =================
@@ -71,6 +71,31 @@ class QuestionOut(BaseModel):
     options: Optional[List[str]] = None
 
 
+# ================= PROCTORING =================
+class ProctorStagesUpdate(BaseModel):
+    stages: List[str]
+
+
+class ProctorClientEvent(BaseModel):
+    # Stored in an INTEGER column and compared against the session's high-water mark
+    seq: int = Field(ge=1, le=2**31 - 1)
+    type: str
+    at: Optional[float] = None  # client clock, epoch milliseconds
+    detail: Optional[dict] = None
+
+
+class ProctorEventBatch(BaseModel):
+    session_id: int
+    events: List[ProctorClientEvent]
+
+    @field_validator("events")
+    @classmethod
+    def validate_events(cls, value):
+        if len(value) > 200:
+            raise ValueError("At most 200 events per batch")
+        return value
+
+
 # ================= SUBMISSIONS =================
 class AnswerSubmit(BaseModel):
     question_id: int
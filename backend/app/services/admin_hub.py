@@ -0,0 +1,161 @@
+import asyncio
+import os
+import time
+
+from app.services.event_bus import event_bus
+
+# ===================== CONFIG =====================
+# Messages queued per admin socket before the oldest are dropped
+ADMIN_QUEUE_SIZE = int(os.getenv("PROCTOR_ADMIN_QUEUE_SIZE", "256"))
+# A socket whose queue has overflowed continuously for this long is closed
+ADMIN_SLOW_SECONDS = float(os.getenv("PROCTOR_ADMIN_SLOW_SECONDS", "10"))
+
+
+# ===================== CONNECTIONS =====================
+class AdminConnection:
+    """One admin socket: its subscription, outbound queue and writer task."""
+
+    def __init__(self, websocket, exam_ids=None, queue_size=ADMIN_QUEUE_SIZE):
+        self.websocket = websocket
+        # None means every exam
+        self.exam_ids = exam_ids
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.sent = 0
+        self.dropped = 0
+        self.overflowing_since = None
+        self.writer = None
+
+    def wants(self, exam_id):
+        return self.exam_ids is None or exam_id in self.exam_ids
+
+    async def write(self):
+        while True:
+            message = await self.queue.get()
+            await self.websocket.send_json(message)
+            self.sent += 1
+            if self.queue.empty():
+                self.overflowing_since = None
+
+
+class ConnectionManager:
+    """Fan-out hub for /ws/admin.
+
+    publish() never waits on a socket: it only enqueues, and each connection
+    drains its own queue in its own writer task, so one slow browser cannot
+    hold up the rest. A full queue drops its oldest message (the dashboard
+    only needs the latest picture); a socket that stays full for
+    ADMIN_SLOW_SECONDS is closed.
+
+    Messages travel through an EventBus (app.services.event_bus), so an
+    admin connected to one worker also sees events raised on the others.
+    publish() may be called from any thread; delivery happens on the event
+    loop once per bus tick.
+    """
+
+    def __init__(self, bus=event_bus, queue_size=ADMIN_QUEUE_SIZE, slow_seconds=ADMIN_SLOW_SECONDS):
+        self.bus = bus
+        self.queue_size = queue_size
+        self.slow_seconds = slow_seconds
+        self.published = 0
+        self.dropped = 0
+        self.closed_slow = 0
+        self.active_connections: list[AdminConnection] = []
+        # Close tasks of slow connections, referenced until they finish
+        self._closing = set()
+
+    def start(self):
+        """Start receiving from the bus; call once on the running loop."""
+        self.bus.start(self._dispatch_batch)
+
+    def stop(self):
+        self.bus.stop()
+
+    async def connect(self, websocket, exam_ids=None):
+        await websocket.accept()
+        return self.attach(websocket, exam_ids)
+
+    def attach(self, websocket, exam_ids=None):
+        """Register an accepted socket and start its writer."""
+        connection = AdminConnection(websocket, exam_ids, self.queue_size)
+        connection.writer = asyncio.ensure_future(self._run_writer(connection))
+        self.active_connections.append(connection)
+        return connection
+
+    def subscribe(self, connection, exam_ids):
+        connection.exam_ids = None if exam_ids is None else set(exam_ids)
+
+    def disconnect(self, connection):
+        if connection in self.active_connections:
+            self.active_connections.remove(connection)
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def _run_writer(self, connection):
+        try:
+            await connection.write()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket gone; the receive loop will notice too
+            self.disconnect(connection)
+
+    # ---------- publishing ----------
+    def publish(self, message):
+        """Send message to every admin, on any worker, watching message["exam_id"]."""
+        self.published += 1
+        self.bus.publish(message)
+
+    def _dispatch_batch(self, messages):
+        if not self.active_connections:
+            return
+        for message in messages:
+            self._dispatch(message)
+
+    def _dispatch(self, message):
+        now = time.monotonic()
+        exam_id = message.get("exam_id")
+        for connection in list(self.active_connections):
+            if not connection.wants(exam_id):
+                continue
+            queue = connection.queue
+            if queue.full():
+                queue.get_nowait()
+                connection.dropped += 1
+                self.dropped += 1
+                if connection.overflowing_since is None:
+                    connection.overflowing_since = now
+                elif now - connection.overflowing_since > self.slow_seconds:
+                    self._close_slow(connection)
+                    continue
+            queue.put_nowait(message)
+
+    def _close_slow(self, connection):
+        self.closed_slow += 1
+        self.disconnect(connection)
+        task = asyncio.ensure_future(self._close(connection.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket):
+        try:
+            # 1013: try again later
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+    async def broadcast(self, message: dict):
+        self.publish(message)
+
+    def stats(self):
+        return {
+            "connections": len(self.active_connections),
+            "bus": self.bus.stats(),
+            "published": self.published,
+            "dropped": self.dropped,
+            "closed_slow": self.closed_slow,
+            "max_queue": max((c.queue.qsize() for c in self.active_connections), default=0),
+        }
+
+
+manager = ConnectionManager()
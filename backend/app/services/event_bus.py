@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# ===================== CONFIG =====================
+# "local" delivers within this process (single uvicorn worker only);
+# "sqlite" shares events between every worker on the machine
+EVENT_BUS = os.getenv("PROCTOR_EVENT_BUS", "local")
+EVENT_DB_PATH = os.getenv("PROCTOR_EVENT_DB", "./proctor_events.db")
+# Events are sent and received in one batch per tick
+EVENT_TICK_MS = int(os.getenv("PROCTOR_EVENT_TICK_MS", "50"))
+# Seconds a published event stays readable in the shared log
+EVENT_RETENTION = float(os.getenv("PROCTOR_EVENT_RETENTION", "60"))
+
+# Publish-to-deliver samples kept for the latency percentiles
+_LATENCY_SAMPLES = 1024
+
+
+# ===================== INTERFACE =====================
+class EventBus:
+    """Carries admin live events to every worker's ConnectionManager.
+
+    publish() may be called from any thread and only appends to an outbox.
+    Once per tick the outbox is sent as one batch with _send() and whatever
+    _receive() returns is handed to the deliver callback, also as one
+    batch. _send and _receive run on a worker thread, so a shared log
+    that is slow or locked by another worker never stalls the event loop;
+    delivery happens back on the loop. A broker-backed bus (Redis, NATS, ...) only needs to
+    implement _send and _receive; every event it returns must carry the
+    "published_at" timestamp it was sent with.
+    """
+
+    def __init__(self, tick_ms=EVENT_TICK_MS):
+        self.tick = tick_ms / 1000.0
+        self.published = 0
+        self.delivered = 0
+        self.batches = 0
+        self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self._outbox = []
+        self._lock = threading.Lock()
+        # One exchange with the transport at a time (tick thread vs stop())
+        self._io_lock = threading.Lock()
+        self._deliver = None
+        self._task = None
+
+    def publish(self, event):
+        with self._lock:
+            self._outbox.append({"published_at": time.time(), "event": event})
+            self.published += 1
+
+    def start(self, deliver):
+        """Begin ticking on the running loop; deliver(events) gets each batch."""
+        self._deliver = deliver
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                received = await asyncio.to_thread(self._exchange)
+                self._deliver_received(received)
+            except Exception as e:
+                print("PROCTOR EVENT BUS TICK FAILED:", e)
+
+    def run_tick(self):
+        """One send-and-receive round on the calling thread."""
+        self._deliver_received(self._exchange())
+
+    def _exchange(self):
+        with self._io_lock:
+            with self._lock:
+                outbox, self._outbox = self._outbox, []
+            if outbox:
+                self._send(outbox)
+            return self._receive()
+
+    def _deliver_received(self, received):
+        if not received:
+            return
+        now = time.time()
+        self._latencies.extend(now - item["published_at"] for item in received)
+        self.delivered += len(received)
+        self.batches += 1
+        if self._deliver is not None:
+            self._deliver([item["event"] for item in received])
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Whatever is still queued reaches the other workers
+        with self._io_lock:
+            with self._lock:
+                outbox, self._outbox = self._outbox, []
+            if outbox:
+                self._send(outbox)
+
+    def _send(self, batch):
+        raise NotImplementedError
+
+    def _receive(self):
+        raise NotImplementedError
+
+    def _percentile_ms(self, p):
+        if not self._latencies:
+            return 0.0
+        samples = sorted(self._latencies)
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000.0
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "avg_batch": self.delivered / self.batches if self.batches else 0.0,
+            "latency_p50_ms": self._percentile_ms(0.5),
+            "latency_p99_ms": self._percentile_ms(0.99),
+        }
+
+
+# ===================== IN-PROCESS =====================
+class LocalEventBus(EventBus):
+    def __init__(self, tick_ms=EVENT_TICK_MS):
+        super().__init__(tick_ms)
+        self._inbox = []
+
+    def _send(self, batch):
+        self._inbox.extend(batch)
+
+    def _receive(self):
+        inbox, self._inbox = self._inbox, []
+        return inbox
+
+    def stats(self):
+        return {"bus": "local", **super().stats()}
+
+
+# ===================== SQLITE (WAL) =====================
+class SQLiteEventBus(EventBus):
+    """An append-only event log in a WAL-mode SQLite file shared by workers.
+
+    Each tick a worker inserts its outbox in one transaction and reads every
+    row past the last id it has seen, its own included. SQLite serializes
+    writers, so ids become visible in order and a reader never skips one.
+    Rows older than the retention window are pruned now and then.
+    """
+
+    PRUNE_EVERY = 200
+
+    def __init__(self, path=EVENT_DB_PATH, tick_ms=EVENT_TICK_MS, retention=EVENT_RETENTION):
+        super().__init__(tick_ms)
+        self.path = path
+        self.retention = retention
+        self.ticks = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Live dashboard events are not worth an fsync each
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS admin_events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " published_at REAL NOT NULL,"
+            " body TEXT NOT NULL)"
+        )
+        # Only events published after this worker started
+        self._last_id = self._conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM admin_events"
+        ).fetchone()[0]
+
+    def _send(self, batch):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT INTO admin_events (published_at, body) VALUES (?, ?)",
+                [(item["published_at"], json.dumps(item["event"])) for item in batch],
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _receive(self):
+        rows = self._conn.execute(
+            "SELECT id, published_at, body FROM admin_events WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        self.ticks += 1
+        if self.ticks % self.PRUNE_EVERY == 0:
+            self._conn.execute(
+                "DELETE FROM admin_events WHERE published_at < ?", (time.time() - self.retention,)
+            )
+        if not rows:
+            return []
+        self._last_id = rows[-1][0]
+        return [{"published_at": published_at, "event": json.loads(body)} for _, published_at, body in rows]
+
+    def stats(self):
+        return {"bus": "sqlite", "path": self.path, **super().stats()}
+
+
+def create_event_bus(kind=EVENT_BUS):
+    if kind == "local":
+        return LocalEventBus()
+    if kind == "sqlite":
+        return SQLiteEventBus()
+    raise ValueError(f"Unknown PROCTOR_EVENT_BUS: {kind}")
+
+
+event_bus = create_event_bus()
@@ -0,0 +1,400 @@
+"""Evidence thumbnails of violating frames, in append-only segment files.
+
+Each record is a small header (key, stored_at, length) followed by a
+downscaled, re-encoded JPEG. Keys are content hashes of the original
+frame, so a frame is stored once however many violations point at it;
+ProctorViolation.evidence_key holds the key. The in-memory index (key ->
+segment, offset, length) is rebuilt from the segment headers on the
+writer thread at startup and topped up from other workers' segments on a miss.
+
+Every worker appends to its own open segment (<created>-<pid>.open) and
+seals it (renamed to .seg) when it is full. Only sealed segments are
+expired or compacted. Prune expired evidence and reclaim the space of
+deleted violations (run from backend/):
+
+    python -m app.services.evidence_store --compact
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import cv2
+
+from app.services.frame_analyzer import decode_image
+
+# ===================== CONFIG =====================
+EVIDENCE_ENABLED = os.getenv("PROCTOR_EVIDENCE", "1") == "1"
+EVIDENCE_DIR = os.getenv("PROCTOR_EVIDENCE_DIR", "./proctor_evidence")
+# Size at which a worker seals its segment and starts a new one
+EVIDENCE_SEGMENT_MB = float(os.getenv("PROCTOR_EVIDENCE_SEGMENT_MB", "64"))
+# Evidence older than this is removed by the next compaction
+EVIDENCE_RETENTION_DAYS = float(os.getenv("PROCTOR_EVIDENCE_RETENTION_DAYS", "30"))
+# A sealed segment is rewritten once this share of its bytes is dead
+EVIDENCE_COMPACT_RATIO = float(os.getenv("PROCTOR_EVIDENCE_COMPACT_RATIO", "0.5"))
+EVIDENCE_THUMB_WIDTH = int(os.getenv("PROCTOR_EVIDENCE_THUMB_WIDTH", "320"))
+EVIDENCE_JPEG_QUALITY = int(os.getenv("PROCTOR_EVIDENCE_JPEG_QUALITY", "60"))
+# Frames waiting for the writer thread; beyond this new evidence is dropped
+EVIDENCE_QUEUE = int(os.getenv("PROCTOR_EVIDENCE_QUEUE", "256"))
+
+# Violations whose frame is kept
+EVIDENCE_TYPES = {"LEFT_SEAT", "MULTIPLE_FACES", "SPOOF_ATTACK"}
+
+# key (16-byte digest), stored_at, payload length
+_HEADER = struct.Struct("<16sdI")
+
+
+def evidence_key(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def thumbnail(data, width=EVIDENCE_THUMB_WIDTH, quality=EVIDENCE_JPEG_QUALITY):
+    img, _ = decode_image(data, "color", max_width=width)
+    if img is None:
+        return None
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
+
+
+def _scan(path, start=0):
+    """(key, stored_at, offset, length) of the complete records from `start`, and where they end."""
+    records = []
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                break
+            raw_key, stored_at, length = _HEADER.unpack(header)
+            offset = pos + _HEADER.size
+            if f.seek(length, os.SEEK_CUR) > os.fstat(f.fileno()).st_size:
+                break  # torn tail of a crashed write
+            records.append((raw_key.hex(), stored_at, offset, length))
+            pos = offset + length
+    return records, pos
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# ===================== STORE =====================
+class EvidenceStore:
+    def __init__(self, root=EVIDENCE_DIR, enabled=EVIDENCE_ENABLED,
+                 segment_mb=EVIDENCE_SEGMENT_MB, retention_days=EVIDENCE_RETENTION_DAYS,
+                 compact_ratio=EVIDENCE_COMPACT_RATIO, queue_size=EVIDENCE_QUEUE):
+        self.root = root
+        self.enabled = enabled
+        self.segment_bytes = int(segment_mb * 1024 * 1024)
+        self.retention = retention_days * 86400
+        self.compact_ratio = compact_ratio
+        self.stored = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failures = 0
+        self._index = {}
+        self._scanned = {}     # segment name -> bytes indexed so far
+        self._maps = {}        # segment name -> (mmap, mapped length)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._segment = None   # this worker's open segment: (name, file)
+        self._thread = None
+        self._loaded = False
+
+    # ---------- request path ----------
+    def capture(self, data, now=None):
+        """Key under which the frame's thumbnail will be stored, or None.
+
+        Only hashes and enqueues; decoding, encoding and the write happen on
+        the writer thread. Until that thread has loaded the index a repeated
+        frame is queued again and skipped there.
+        """
+        if not self.enabled:
+            return None
+        key = evidence_key(data)
+        if self._loaded and key in self._index:
+            self.deduplicated += 1
+            return key
+        try:
+            self._queue.put_nowait((key, data, time.time() if now is None else now))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        self._ensure_thread()
+        return key
+
+    # ---------- writer ----------
+    def start(self):
+        """Start the writer thread, which loads the index before anything else."""
+        if self.enabled:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="proctor-evidence", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        try:
+            self._load()
+        except Exception as e:
+            self.failures += 1
+            print("PROCTOR EVIDENCE INDEX LOAD FAILED:", e)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            key, data, now = item
+            try:
+                thumb = thumbnail(data)
+                if thumb is not None:
+                    self._append(key, thumb, now)
+            except Exception as e:
+                self.failures += 1
+                print("PROCTOR EVIDENCE WRITE FAILED:", e)
+
+    def _append(self, key, payload, now):
+        self._load()
+        with self._lock:
+            if key in self._index:
+                return
+            if self._segment is None or self._segment[1].tell() >= self.segment_bytes:
+                self._roll()
+            name, f = self._segment
+            offset = f.tell() + _HEADER.size
+            f.write(_HEADER.pack(bytes.fromhex(key), now, len(payload)))
+            f.write(payload)
+            f.flush()
+            self._scanned[name] = offset + len(payload)
+            self._index[key] = (name, offset, len(payload), now)
+            self.stored += 1
+
+    def _roll(self):
+        # Caller holds _lock
+        if self._segment is not None:
+            self._seal(*self._segment)
+        name = f"{int(time.time() * 1000)}-{os.getpid()}.open"
+        self._segment = (name, open(os.path.join(self.root, name), "ab"))
+        self._scanned[name] = 0
+
+    def _seal(self, name, f):
+        f.close()
+        sealed = name[:-len(".open")] + ".seg"
+        os.rename(os.path.join(self.root, name), os.path.join(self.root, sealed))
+        self._rename(name, sealed)
+
+    def _rename(self, old, new):
+        self._scanned[new] = self._scanned.pop(old, 0)
+        if old in self._maps:
+            self._maps[new] = self._maps.pop(old)
+        for key, (segment, offset, length, stored_at) in list(self._index.items()):
+            if segment == old:
+                self._index[key] = (new, offset, length, stored_at)
+
+    # ---------- index ----------
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(self.root, exist_ok=True)
+            for name in os.listdir(self.root):
+                # Open segments of workers that are gone will never be sealed
+                if name.endswith(".open") and not _pid_alive(int(name[:-5].split("-")[1])):
+                    try:
+                        self._seal(name, open(os.path.join(self.root, name), "rb"))
+                    except FileNotFoundError:
+                        pass  # another worker sealed it first
+            self._refresh()
+            self._loaded = True
+
+    def _refresh(self):
+        # Caller holds _lock
+        names = set(os.listdir(self.root))
+        for name in list(self._scanned):
+            if name in names:
+                continue
+            sealed = name[:-len(".open")] + ".seg" if name.endswith(".open") else None
+            if sealed in names:
+                self._rename(name, sealed)
+            else:
+                self._forget_segment(name)
+        own = self._segment[0] if self._segment else None
+        for name in sorted(names):
+            if not name.endswith((".seg", ".open")) or name == own:
+                continue
+            path = os.path.join(self.root, name)
+            scanned = self._scanned.get(name, 0)
+            if os.path.getsize(path) <= scanned:
+                continue
+            records, end = _scan(path, scanned)
+            for key, stored_at, offset, length in records:
+                self._index.setdefault(key, (name, offset, length, stored_at))
+            self._scanned[name] = end
+
+    def _forget_segment(self, name):
+        # Caller holds _lock
+        self._scanned.pop(name, None)
+        mapped = self._maps.pop(name, None)
+        if mapped is not None:
+            try:
+                mapped[0].close()
+            except BufferError:
+                pass  # a reader still holds a view; freed with it
+        for key in [k for k, loc in self._index.items() if loc[0] == name]:
+            del self._index[key]
+
+    # ---------- reads ----------
+    def read(self, key):
+        """The stored thumbnail as a zero-copy memoryview of the segment, or None."""
+        if not self.enabled or not key:
+            return None
+        self._load()
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                # Possibly written by another worker since the last look
+                self._refresh()
+                location = self._index.get(key)
+            if location is None:
+                return None
+            name, offset, length, _ = location
+            try:
+                mapped = self._map(name, offset + length)
+            except FileNotFoundError:
+                # Compacted by another worker: the record may live on in
+                # the rewritten segment
+                self._forget_segment(name)
+                self._refresh()
+                location = self._index.get(key)
+                if location is None:
+                    return None
+                name, offset, length, _ = location
+                try:
+                    mapped = self._map(name, offset + length)
+                except FileNotFoundError:
+                    self._forget_segment(name)
+                    return None
+            return memoryview(mapped)[offset:offset + length]
+
+    def _map(self, name, needed):
+        # Caller holds _lock; an open segment grows, so remap when it has
+        cached = self._maps.get(name)
+        if cached is not None and cached[1] >= needed:
+            return cached[0]
+        with open(os.path.join(self.root, name), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps[name] = (mapped, size)
+        return mapped
+
+    # ---------- retention and compaction ----------
+    def compact(self, live_keys=None, now=None):
+        """Delete expired evidence and rewrite mostly-dead sealed segments.
+
+        live_keys, if given, are the keys still referenced by violations;
+        anything else is dead too. Returns what was reclaimed.
+        """
+        self._load()
+        now = time.time() if now is None else now
+        result = {"segments_deleted": 0, "segments_rewritten": 0, "records_dropped": 0, "bytes_reclaimed": 0}
+        with self._lock:
+            self._refresh()
+            for name in sorted(n for n in os.listdir(self.root) if n.endswith(".seg")):
+                path = os.path.join(self.root, name)
+                records, _ = _scan(path)
+                keep = [
+                    r for r in records
+                    if now - r[1] < self.retention and (live_keys is None or r[0] in live_keys)
+                ]
+                size = os.path.getsize(path)
+                if len(keep) == len(records):
+                    continue
+                kept_bytes = sum(_HEADER.size + r[3] for r in keep)
+                if keep and 1 - kept_bytes / size < self.compact_ratio:
+                    continue
+
+                if keep:
+                    rewritten = name[:-len(".seg")] + f"-c{int(now)}.seg"
+                    with open(path, "rb") as src, open(os.path.join(self.root, rewritten + ".tmp"), "wb") as dst:
+                        for key, stored_at, offset, length in keep:
+                            src.seek(offset)
+                            dst.write(_HEADER.pack(bytes.fromhex(key), stored_at, length))
+                            dst.write(src.read(length))
+                    os.rename(os.path.join(self.root, rewritten + ".tmp"), os.path.join(self.root, rewritten))
+                    result["segments_rewritten"] += 1
+                else:
+                    result["segments_deleted"] += 1
+                os.remove(path)
+                self._forget_segment(name)
+                result["records_dropped"] += len(records) - len(keep)
+                result["bytes_reclaimed"] += size - kept_bytes
+            self._refresh()
+        return result
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._segment is not None:
+                self._seal(*self._segment)
+                self._segment = None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "indexed": len(self._index),
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "pending": self._queue.qsize(),
+            "segments": len(self._scanned),
+        }
+
+
+evidence_store = EvidenceStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expire and compact proctoring evidence")
+    parser.add_argument("--compact", action="store_true",
+                        help="also drop evidence no violation refers to any more")
+    args = parser.parse_args()
+
+    live_keys = None
+    if args.compact:
+        from app.database import SessionLocal
+        from app.models_proctor import ProctorViolation
+
+        db = SessionLocal()
+        try:
+            live_keys = {
+                key for (key,) in db.query(ProctorViolation.evidence_key).filter(
+                    ProctorViolation.evidence_key.isnot(None)
+                ).distinct()
+            }
+        finally:
+            db.close()
+    print(evidence_store.compact(live_keys))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+
+from app.services.face_utils import FACE_MATCH_THRESHOLD
+
+# ===================== CONFIG =====================
+DUPLICATE_THRESHOLD = float(os.getenv("PROCTOR_DUPLICATE_THRESHOLD", str(FACE_MATCH_THRESHOLD)))
+# Rows compared per matrix product; keeps the temporary small on big exams
+INDEX_BLOCK = 4096
+EMBEDDING_DIM = 128
+
+
+# ===================== INDEX =====================
+class ExamFaceIndex:
+    """Reference embeddings of one exam in a growable float32 matrix.
+
+    A query is one blocked matrix-vector product using
+    |a - q|^2 = |a|^2 + |q|^2 - 2 a.q with the row norms kept from insert,
+    so each start costs O(n) vectorized work instead of an O(n) Python loop
+    (and never the O(n^2) all-pairs scan).
+    """
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        # Highest session id loaded from the database, for catch-up queries
+        self.watermark = 0
+        self._known = set()
+        self._vectors = np.zeros((capacity, EMBEDDING_DIM), np.float32)
+        self._norms = np.zeros(capacity, np.float32)
+        self._users = np.zeros(capacity, np.int64)
+        self._sessions = np.zeros(capacity, np.int64)
+
+    def _grow(self):
+        capacity = len(self._vectors) * 2
+        for name in ("_vectors", "_norms", "_users", "_sessions"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, session_id, user_id, embedding):
+        if session_id in self._known:
+            return
+        self._known.add(session_id)
+        if self.size == len(self._vectors):
+            self._grow()
+        vector = np.asarray(embedding, np.float32)
+        self._vectors[self.size] = vector
+        self._norms[self.size] = vector @ vector
+        self._users[self.size] = user_id
+        self._sessions[self.size] = session_id
+        self.size += 1
+
+    def query(self, embedding, user_id, threshold=DUPLICATE_THRESHOLD):
+        """Closest entry of a different user within threshold: (session_id, user_id, distance) or None."""
+        q = np.asarray(embedding, np.float32)
+        q_norm = q @ q
+        best = None
+        for start in range(0, self.size, INDEX_BLOCK):
+            stop = min(start + INDEX_BLOCK, self.size)
+            d2 = self._norms[start:stop] + q_norm - 2.0 * (self._vectors[start:stop] @ q)
+            d2[self._users[start:stop] == user_id] = np.inf
+            k = int(np.argmin(d2))
+            if best is None or d2[k] < best[1]:
+                best = (start + k, float(d2[k]))
+
+        if best is None or not np.isfinite(best[1]):
+            return None
+        distance = float(np.sqrt(max(best[1], 0.0)))
+        if distance >= threshold:
+            return None
+        row = best[0]
+        return int(self._sessions[row]), int(self._users[row]), distance
+
+
+class FaceIndexRegistry:
+    """One ExamFaceIndex per exam, caught up from the database on use.
+
+    Other workers insert sessions too, so before each query the index pulls
+    rows with ids above the last one it loaded (a primary-key range scan).
+    """
+
+    def __init__(self):
+        self._exams = {}
+        self.duplicates = 0
+
+    def index(self, exam_id):
+        index = self._exams.get(exam_id)
+        if index is None:
+            index = self._exams[exam_id] = ExamFaceIndex()
+        return index
+
+    def catch_up(self, exam_id, rows):
+        """rows: (session_id, user_id, embedding) with ids above the index's watermark."""
+        index = self.index(exam_id)
+        for session_id, user_id, embedding in rows:
+            index.add(session_id, user_id, embedding)
+            index.watermark = max(index.watermark, session_id)
+
+    def check_and_add(self, exam_id, session_id, user_id, embedding):
+        index = self.index(exam_id)
+        match = index.query(embedding, user_id)
+        index.add(session_id, user_id, embedding)
+        if match is not None:
+            self.duplicates += 1
+        return match
+
+    def stats(self):
+        return {
+            "exams": len(self._exams),
+            "entries": sum(index.size for index in self._exams.values()),
+            "duplicates": self.duplicates,
+        }
+
+
+face_index = FaceIndexRegistry()
@@ -0,0 +1,64 @@
+import os
+
+# ===================== CONFIG =====================
+# Force a full-frame scan every N frames so a second person entering the
+# frame outside the tracked region is still seen; 0 disables tracking
+TRACK_FULL_SCAN_EVERY = int(os.getenv("PROCTOR_TRACK_FULL_SCAN_EVERY", "5"))
+
+
+# ===================== TRACKER =====================
+class FaceTracker:
+    """Remembers each session's last face box so the cascade can search a
+    small region around it instead of the whole frame."""
+
+    def __init__(self, full_scan_every=TRACK_FULL_SCAN_EVERY):
+        self.full_scan_every = full_scan_every
+        self.tracks = {}
+        self.roi_scans = 0
+        self.full_scans = 0
+
+    def hint(self, session_id, force_full=False):
+        """Box to search first for this session's next frame, or None for a full scan."""
+        track = self.tracks.get(session_id)
+        if force_full or track is None or self.full_scan_every <= 0:
+            return None
+        if track["since_full"] + 1 >= self.full_scan_every:
+            return None
+        return track["box"]
+
+    def update(self, session_id, metrics):
+        # Cached results reuse an earlier detection; nothing new to learn
+        if metrics.get("cache"):
+            return
+
+        if metrics["full_scan"]:
+            self.full_scans += 1
+        else:
+            self.roi_scans += 1
+
+        boxes = metrics["boxes"]
+        # Only a single face is worth tracking; zero or several faces need
+        # the full frame until the scene settles again
+        if len(boxes) != 1:
+            self.tracks.pop(session_id, None)
+            return
+
+        since_full = 0
+        if not metrics["full_scan"]:
+            since_full = self.tracks.get(session_id, {}).get("since_full", 0) + 1
+        self.tracks[session_id] = {"box": boxes[0], "since_full": since_full}
+
+    def forget(self, session_id):
+        self.tracks.pop(session_id, None)
+
+    def stats(self):
+        total = self.roi_scans + self.full_scans
+        return {
+            "tracked_sessions": len(self.tracks),
+            "roi_scans": self.roi_scans,
+            "full_scans": self.full_scans,
+            "roi_ratio": self.roi_scans / total if total else 0.0,
+        }
+
+
+tracker = FaceTracker()
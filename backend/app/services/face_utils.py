@@ -1,15 +1,52 @@
-import face_recognition
+try:
+    import face_recognition
+except ImportError:  # optional: identity checks are skipped without it
+    face_recognition = None
 import numpy as np
 
-def extract_face_embedding(image):
-    rgb = image[:, :, ::-1]  # BGR → RGB
-    encodings = face_recognition.face_encodings(rgb)
+# Below this distance two embeddings are the same person
+FACE_MATCH_THRESHOLD = 0.6
+
+
+def identity_available():
+    return face_recognition is not None
+
+
+def extract_face_embedding(image, box=None):
+    """128-d float32 embedding of the face in a BGR image, or None.
+
+    box is an (x, y, w, h) face already found by the Haar cascade; passing
+    it skips face_recognition's own (much slower) face search.
+    """
+    if face_recognition is None:
+        return None
+
+    rgb = np.ascontiguousarray(image[:, :, ::-1])  # BGR → RGB
+    locations = None
+    if box is not None:
+        x, y, w, h = box
+        locations = [(y, x + w, y + h, x)]
+    encodings = face_recognition.face_encodings(rgb, known_face_locations=locations)
 
     if not encodings:
         return None
 
-    return encodings[0]
+    return np.asarray(encodings[0], dtype=np.float32)
+
+
+def embedding_to_bytes(embedding):
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def embedding_from_bytes(blob):
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def face_distances(refs, lives):
+    """Row-wise distances between two (n, 128) stacks in one operation."""
+    return np.linalg.norm(refs - lives, axis=1)
+
 
-def compare_faces(ref_embedding, live_embedding, threshold=0.6):
-    distance = np.linalg.norm(ref_embedding - live_embedding)
+def compare_faces(ref_embedding, live_embedding, threshold=FACE_MATCH_THRESHOLD):
+    distance = float(face_distances(ref_embedding[None], live_embedding[None])[0])
     return distance < threshold, distance
@@ -0,0 +1,493 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from app.services.motion_arena import arena
+from app.services.frame_cache import frame_cache, frame_digest, dhash
+from app.services.face_utils import extract_face_embedding
+from app.services.frame_rules import FRAME_RULES
+
+# ===================== CONFIG =====================
+# Worker threads running OpenCV work. cv2 releases the GIL inside imdecode,
+# cvtColor, detectMultiScale and Laplacian, so threads scale across cores.
+ANALYZER_WORKERS = int(os.getenv("PROCTOR_ANALYZER_WORKERS", str(os.cpu_count() or 1)))
+
+# Max frames queued or in flight; beyond this new frames are rejected
+ANALYZER_QUEUE_DEPTH = int(os.getenv("PROCTOR_ANALYZER_QUEUE_DEPTH", str(ANALYZER_WORKERS * 4)))
+
+# Face tracking: region of interest around the last face, in multiples of
+# the face size added on each side, and the pyramid range searched there
+TRACK_ROI_MARGIN = float(os.getenv("PROCTOR_TRACK_ROI_MARGIN", "0.6"))
+TRACK_SCALE_RANGE = (0.7, 1.4)
+
+# Ingest tier: how incoming JPEGs are decoded. "color" is the original
+# full BGR decode; the gray tiers decode straight to (reduced) grayscale,
+# and every metric then comes from that single buffer.
+DECODE_MODES = {
+    "color": (cv2.IMREAD_COLOR, 1),
+    "gray": (cv2.IMREAD_GRAYSCALE, 1),
+    "gray_half": (cv2.IMREAD_REDUCED_GRAYSCALE_2, 2),
+    "gray_quarter": (cv2.IMREAD_REDUCED_GRAYSCALE_4, 4),
+    "gray_eighth": (cv2.IMREAD_REDUCED_GRAYSCALE_8, 8),
+}
+DECODE_MODE = os.getenv("PROCTOR_DECODE_MODE", "color")
+if DECODE_MODE not in DECODE_MODES:
+    raise ValueError(f"Unknown PROCTOR_DECODE_MODE: {DECODE_MODE}")
+# Working width cap after decoding, 0 for none
+DECODE_MAX_WIDTH = int(os.getenv("PROCTOR_DECODE_MAX_WIDTH", "0"))
+
+# Smallest face searched for, in original-frame pixels
+MIN_FACE = 30
+# The Haar cascade's own window; no point asking for anything smaller
+CASCADE_WINDOW = 24
+
+CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+class AnalyzerBusy(Exception):
+    pass
+
+
+# ===================== PER-WORKER CASCADE =====================
+# CascadeClassifier is not safe to share across threads, so every worker
+# thread lazily loads its own copy.
+_local = threading.local()
+
+
+def get_cascade():
+    cascade = getattr(_local, "cascade", None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(CASCADE_PATH)
+        _local.cascade = cascade
+    return cascade
+
+
+def min_face_side(scale=1):
+    return max(CASCADE_WINDOW, round(MIN_FACE / scale))
+
+
+def detect_faces(gray, scale=1):
+    side = min_face_side(scale)
+    return get_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3, minSize=(side, side))
+
+
+def detect_faces_in_roi(gray, box, scale=1):
+    """Search only around a previous face box, at a narrow scale range."""
+    x, y, w, h = box
+    mx, my = int(w * TRACK_ROI_MARGIN), int(h * TRACK_ROI_MARGIN)
+    x0, y0 = max(0, x - mx), max(0, y - my)
+    x1, y1 = min(gray.shape[1], x + w + mx), min(gray.shape[0], y + h + my)
+
+    lo, hi = TRACK_SCALE_RANGE
+    min_side = max(min_face_side(scale), int(min(w, h) * lo))
+    max_side = max(min_side + 1, int(max(w, h) * hi))
+    faces = get_cascade().detectMultiScale(
+        gray[y0:y1, x0:x1],
+        scaleFactor=1.1,
+        minNeighbors=3,
+        minSize=(min_side, min_side),
+        maxSize=(max_side, max_side),
+    )
+    if len(faces) == 0:
+        return faces
+    return faces + np.array([x0, y0, 0, 0])
+
+
+def detect_faces_tracked(gray, track_box=None, scale=1):
+    """Returns (faces, full_scan). Falls back to a full scan when the ROI is empty."""
+    if track_box is not None:
+        faces = detect_faces_in_roi(gray, track_box, scale)
+        if len(faces):
+            return faces, False
+    return detect_faces(gray, scale), True
+
+
+# ===================== DECODE =====================
+def decode_image(data, mode=None, max_width=None):
+    """Decode per the ingest tier. Returns (image, scale) or (None, 1).
+
+    image is BGR in "color" mode and grayscale otherwise; scale is how many
+    original pixels one working pixel covers.
+    """
+    mode = mode or DECODE_MODE
+    max_width = DECODE_MAX_WIDTH if max_width is None else max_width
+    flag, scale = DECODE_MODES[mode]
+
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if img is None:
+        return None, 1
+
+    if max_width and img.shape[1] > max_width:
+        factor = max_width / img.shape[1]
+        img = cv2.resize(img, (max_width, max(1, round(img.shape[0] * factor))), interpolation=cv2.INTER_AREA)
+        scale /= factor
+    return img, scale
+
+
+def to_gray(img):
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+# ===================== IMAGE METRICS =====================
+def blur_score(gray):
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def laplacian_var_stack(stack):
+    """Variance of the 3x3 Laplacian for every frame of an (n, h, w) stack.
+
+    Matches cv2.Laplacian(gray, cv2.CV_64F).var(): ksize=1 kernel with
+    BORDER_REFLECT_101, which is numpy's "reflect" padding.
+    """
+    p = np.pad(stack, ((0, 0), (1, 1), (1, 1)), mode="reflect").astype(np.int16)
+    lap = (
+        p[:, :-2, 1:-1] + p[:, 2:, 1:-1]
+        + p[:, 1:-1, :-2] + p[:, 1:-1, 2:]
+        - 4 * p[:, 1:-1, 1:-1]
+    )
+    return lap.reshape(len(stack), -1).var(axis=1)
+
+
+def gray_stack(imgs):
+    n, h, w = imgs.shape[:3]
+    if imgs.ndim == 3:
+        return imgs
+    # Rows of a contiguous stack are independent for colour conversion, so
+    # the whole batch goes through a single cvtColor call.
+    return cv2.cvtColor(imgs.reshape(n * h, w, 3), cv2.COLOR_BGR2GRAY).reshape(n, h, w)
+
+
+def face_fields(gray, track_box=None, scale=1):
+    faces, full_scan = detect_faces_tracked(gray, track_box, scale)
+    return {
+        "faces": len(faces),
+        "boxes": [tuple(int(v) for v in f) for f in faces],
+        "full_scan": full_scan,
+    }
+
+
+# ===================== FRAME CACHE HOOKS =====================
+def cached_exact(data, motion_slot, cache):
+    """(digest, metrics) for a byte-identical repeat, metrics None on a miss."""
+    if cache is None:
+        return None, None
+    t0 = time.perf_counter()
+    digest = frame_digest(data)
+    entry = frame_cache.find_exact(cache, digest)
+    if entry is None:
+        return digest, None
+    return digest, {
+        **entry["metrics"],
+        "full_scan": False,
+        # Still compared against the last frame so replays feed the spoof streaks
+        "motion": arena.update_thumbnail(motion_slot, entry["thumb"]),
+        "cache": "exact",
+        "exit": "cache",
+        "timings": {"cache": time.perf_counter() - t0},
+    }
+
+
+def faces_or_cached(gray, track_box, scale, cache):
+    """Face fields, reused from a perceptually identical cached frame when possible.
+
+    Returns (fields, phash, detect_seconds); detect_seconds is None on reuse.
+    """
+    phash = None
+    if cache is not None:
+        phash = dhash(gray)
+        entry = frame_cache.find_similar(cache, phash)
+        if entry is not None:
+            reused = entry["metrics"]
+            fields = {"faces": reused["faces"], "boxes": reused["boxes"], "full_scan": False, "cache": "similar"}
+            return fields, phash, None
+    t0 = time.perf_counter()
+    fields = face_fields(gray, track_box, scale)
+    return fields, phash, time.perf_counter() - t0
+
+
+def remember(cache, digest, phash, metrics, gray, decode_seconds, detect_seconds):
+    if cache is None:
+        return
+    frame_cache.store(cache, digest, phash, metrics, arena.thumbnail(gray), detect_seconds is not None)
+    frame_cache.record_costs(decode_seconds, detect_seconds)
+
+
+# ===================== PIPELINE =====================
+# Stages run in the configured order, cheap to expensive by default. Only
+# brightness can end a frame early: a dark frame has no face or scene worth
+# analyzing. A stage that is disabled or cut off leaves its metric as None
+# and the rules that need it are not evaluated. "Dark" is the same
+# threshold the CAMERA_COVERED rule uses.
+STAGES = ("brightness", "motion", "blur", "faces")
+
+
+def parse_stages(value):
+    names = [n.strip() for n in value.split(",")] if isinstance(value, str) else list(value)
+    names = [n for n in names if n]
+    unknown = [n for n in names if n not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown proctor stages: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(names))
+
+
+DEFAULT_STAGES = parse_stages(os.getenv("PROCTOR_STAGES", ",".join(STAGES)))
+
+
+def plan_stages(stages, brightness, rules=FRAME_RULES):
+    """Stages that will actually run, given the frame's brightness."""
+    planned = []
+    for stage in stages:
+        planned.append(stage)
+        if stage == "brightness" and brightness < rules["dark_brightness"]:
+            break
+    return planned
+
+
+def _blank_metrics():
+    return {
+        "faces": None,
+        "boxes": [],
+        "full_scan": False,
+        "brightness": None,
+        "motion": None,
+        "blur": None,
+        "exit": None,
+        "timings": {},
+    }
+
+
+def _share(metrics_list, members, stage, seconds):
+    for k in members:
+        metrics_list[k]["timings"][stage] = seconds / len(members)
+
+
+def _item_failed(error):
+    # One client's bad frame must not fail the frames batched with it
+    print("PROCTOR FRAME ANALYSIS FAILED:", error)
+
+
+def analyze_batch(items):
+    """Decode and analyze a list of (jpeg_bytes, opts) items together.
+
+    opts are analyze_jpeg's keyword arguments. Frames of the same resolution
+    are stacked, and brightness, motion and blur are computed over the
+    stack. Returns one metrics dict or None per item; an item that is not
+    an image, or whose analysis raised, gets None without affecting the
+    others.
+    """
+    results = [None] * len(items)
+    digests = [None] * len(items)
+    decode_cost = [0.0] * len(items)
+    groups = {}
+    for i, (data, opts) in enumerate(items):
+        if not data:
+            continue
+        try:
+            digests[i], hit = cached_exact(data, opts.get("motion_slot"), opts.get("cache"))
+            if hit is not None:
+                results[i] = hit
+                continue
+            t0 = time.perf_counter()
+            img, scale = decode_image(data, opts.get("decode_mode"))
+            decode_cost[i] = time.perf_counter() - t0
+        except Exception as e:
+            _item_failed(e)
+            continue
+        if img is not None:
+            groups.setdefault((img.shape, scale), []).append((i, img))
+
+    for (_, scale), members in groups.items():
+        try:
+            _analyze_group(items, members, scale, digests, decode_cost, results)
+        except Exception as e:
+            # A failure in the stacked stages; members not finished stay None
+            _item_failed(e)
+
+    return results
+
+
+def _analyze_group(items, members, scale, digests, decode_cost, results):
+    """Stages of one same-shape group of decoded frames; fills `results`."""
+    idx = [i for i, _ in members]
+    opts = [items[i][1] for i in idx]
+    n = len(idx)
+    metrics = [_blank_metrics() for _ in idx]
+
+    t0 = time.perf_counter()
+    # A lone frame is viewed as a stack of one; no copy
+    imgs = members[0][1][None] if n == 1 else np.stack([img for _, img in members])
+    grays = gray_stack(imgs)
+    _share(metrics, range(n), "decode", time.perf_counter() - t0 + sum(decode_cost[i] for i in idx))
+
+    stages = [o.get("stages") or DEFAULT_STAGES for o in opts]
+    wants = [k for k in range(n) if "brightness" in stages[k]]
+    brightness = np.zeros(n)
+    if wants:
+        t0 = time.perf_counter()
+        brightness[wants] = imgs[wants].reshape(len(wants), -1).mean(axis=1)
+        _share(metrics, wants, "brightness", time.perf_counter() - t0)
+    plans = [plan_stages(stages[k], brightness[k]) for k in range(n)]
+
+    for k in range(n):
+        if "brightness" in plans[k]:
+            metrics[k]["brightness"] = float(brightness[k])
+        if len(plans[k]) < len(stages[k]):
+            metrics[k]["exit"] = "dark"
+            if "faces" not in plans[k]:
+                # Nothing recognisable in a covered camera
+                metrics[k]["faces"] = 0
+
+    wants = [k for k in range(n) if "motion" in plans[k]]
+    if wants:
+        t0 = time.perf_counter()
+        motion = arena.update_many([opts[k].get("motion_slot") for k in wants], grays[wants])
+        for j, k in enumerate(wants):
+            metrics[k]["motion"] = float(motion[j])
+        _share(metrics, wants, "motion", time.perf_counter() - t0)
+
+    wants = [k for k in range(n) if "blur" in plans[k]]
+    if wants:
+        t0 = time.perf_counter()
+        blur = laplacian_var_stack(grays[wants])
+        for j, k in enumerate(wants):
+            metrics[k]["blur"] = float(blur[j])
+        _share(metrics, wants, "blur", time.perf_counter() - t0)
+
+    for k, i in enumerate(idx):
+        try:
+            phash, detect_seconds = None, None
+            if "faces" in plans[k]:
+                t0 = time.perf_counter()
+                fields, phash, detect_seconds = faces_or_cached(
+                    grays[k], opts[k].get("track_box"), scale, opts[k].get("cache")
+                )
+                metrics[k].update(fields)
+                metrics[k]["timings"]["faces"] = time.perf_counter() - t0
+
+            # Identity embedding, only when asked for and there is exactly one face
+            if opts[k].get("embed") and metrics[k]["faces"] == 1:
+                t0 = time.perf_counter()
+                bgr = imgs[k] if imgs.ndim == 4 else cv2.cvtColor(grays[k], cv2.COLOR_GRAY2BGR)
+                metrics[k]["embedding"] = extract_face_embedding(bgr, metrics[k]["boxes"][0])
+                metrics[k]["timings"]["identity"] = time.perf_counter() - t0
+            results[i] = metrics[k]
+            remember(opts[k].get("cache"), digests[i], phash, metrics[k], grays[k],
+                     decode_cost[i], detect_seconds)
+        except Exception as e:
+            _item_failed(e)
+            results[i] = None
+
+
+def analyze_jpeg(data, **opts):
+    """Decode a JPEG and run the stage pipeline on it.
+
+    opts: motion_slot, track_box, cache, decode_mode, stages, embed. Runs on a
+    worker thread. Returns None when the bytes are not an image.
+    Brightness is the mean of whatever was decoded: all BGR channels in
+    "color" mode, the gray buffer otherwise.
+    """
+    return analyze_batch([(data, opts)])[0]
+
+
+# ===================== STAGE STATS =====================
+class StageStats:
+    """Per-stage run counts and timings, fed from the event loop thread.
+
+    With keep_samples set (the benchmark harness does), every timing is
+    also kept in `samples` for percentiles.
+    """
+
+    def __init__(self, keep_samples=False):
+        self.frames = 0
+        self.exits = {}
+        self.stages = {}
+        self.keep_samples = keep_samples
+        self.samples = {}
+
+    def record(self, metrics):
+        self.frames += 1
+        if metrics.get("exit"):
+            self.exits[metrics["exit"]] = self.exits.get(metrics["exit"], 0) + 1
+        for stage, seconds in metrics.get("timings", {}).items():
+            entry = self.stages.setdefault(stage, {"runs": 0, "total_ms": 0.0})
+            entry["runs"] += 1
+            entry["total_ms"] += seconds * 1000.0
+            if self.keep_samples:
+                self.samples.setdefault(stage, []).append(seconds)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "exits": self.exits,
+            "stages": {
+                stage: {**entry, "avg_ms": entry["total_ms"] / entry["runs"]}
+                for stage, entry in self.stages.items()
+            },
+        }
+
+
+stage_stats = StageStats()
+
+
+# ===================== EXECUTOR =====================
+class FrameAnalyzer:
+    def __init__(self, workers=ANALYZER_WORKERS, queue_depth=ANALYZER_QUEUE_DEPTH):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # Parallelism comes from the pool; keep OpenCV from fanning out
+            # its own threads inside each call and oversubscribing the cores.
+            cv2.setNumThreads(1)
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="frame-analyzer",
+            )
+        return self._pool
+
+    @contextmanager
+    def slot(self):
+        # Only touched from the event loop thread, so a plain counter is enough
+        if self.pending >= self.queue_depth:
+            raise AnalyzerBusy()
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args):
+        with self.slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, fn, *args)
+
+    async def analyze(self, data, **opts):
+        """opts are analyze_jpeg's keyword arguments (motion_slot, track_box, cache)."""
+        return await self.run(lambda: analyze_jpeg(data, **opts))
+
+    def stats(self):
+        return {
+            "decode_mode": DECODE_MODE,
+            "decode_max_width": DECODE_MAX_WIDTH,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+analyzer = FrameAnalyzer()
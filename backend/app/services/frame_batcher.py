@@ -0,0 +1,102 @@
+import asyncio
+import os
+from functools import partial
+
+from app.services.frame_analyzer import analyzer, analyze_batch
+
+# ===================== CONFIG =====================
+# How long the first frame of a batch waits for company; 0 disables batching
+BATCH_WINDOW_MS = float(os.getenv("PROCTOR_BATCH_WINDOW_MS", "5"))
+BATCH_MAX_SIZE = int(os.getenv("PROCTOR_BATCH_MAX_SIZE", "64"))
+
+
+# ===================== BATCHER =====================
+class FrameBatcher:
+    """Collects frames from many sessions for a few milliseconds and
+    analyzes them as stacked batches on the analyzer pool."""
+
+    def __init__(self, analyzer=analyzer, window_ms=BATCH_WINDOW_MS, max_size=BATCH_MAX_SIZE):
+        self.analyzer = analyzer
+        self.window = window_ms / 1000.0
+        self.max_size = max_size
+        self.batches = 0
+        self.batched_frames = 0
+        self._items = []
+        self._timer = None
+        self._tasks = set()
+
+    async def analyze(self, data, **opts):
+        if self.window <= 0 or self.max_size <= 1:
+            return await self.analyzer.analyze(data, **opts)
+
+        with self.analyzer.slot():
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._items.append((data, opts, future))
+            if len(self._items) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+            return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        if items:
+            task = asyncio.ensure_future(self._run(items))
+            self._tasks.add(task)
+            task.add_done_callback(partial(self._finished, items))
+
+    def _finished(self, items, task):
+        # A batch that died outside the per-chunk handling must not leave
+        # its callers waiting forever
+        self._tasks.discard(task)
+        error = None if task.cancelled() else task.exception()
+        for _, _, future in items:
+            if future.done():
+                continue
+            if error is None:
+                future.cancel()
+            else:
+                future.set_exception(error)
+
+    async def _run(self, items):
+        self.batches += 1
+        self.batched_frames += len(items)
+
+        # One chunk per worker keeps every core busy while still stacking
+        n_chunks = max(1, min(self.analyzer.workers, len(items)))
+        size = -(-len(items) // n_chunks)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.analyzer.pool,
+                analyze_batch,
+                [(data, opts) for data, opts, _ in chunk],
+            )
+            for chunk in chunks
+        ), return_exceptions=True)
+
+        for chunk, outcome in zip(chunks, outcomes):
+            for k, (_, _, future) in enumerate(chunk):
+                if future.done():
+                    continue
+                if isinstance(outcome, BaseException):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome[k])
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_size": self.max_size,
+            "batches": self.batches,
+            "avg_batch_size": self.batched_frames / self.batches if self.batches else 0.0,
+        }
+
+
+batcher = FrameBatcher()
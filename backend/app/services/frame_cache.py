@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# ===================== CONFIG =====================
+# Recent frames remembered per session; 0 disables the cache
+FRAME_CACHE_SIZE = int(os.getenv("PROCTOR_FRAME_CACHE_SIZE", "4"))
+# Max differing dHash bits for two frames to count as the same scene
+FRAME_CACHE_PHASH_BITS = int(os.getenv("PROCTOR_FRAME_CACHE_PHASH_BITS", "3"))
+# Perceptual hits in a row before the cascade must run again, so a second
+# person stepping into an otherwise unchanged scene is not missed for long
+FRAME_CACHE_MAX_REUSE = int(os.getenv("PROCTOR_FRAME_CACHE_MAX_REUSE", "3"))
+
+# Weight of the newest sample in the running decode/detect cost averages
+_EMA = 0.05
+
+
+# ===================== HASHES =====================
+def frame_digest(data):
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+def dhash(gray):
+    """64-bit difference hash of a 9x8 thumbnail."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+# ===================== CACHE =====================
+class FrameCache:
+    """Per-session memory of recent frames so repeats skip the cascade.
+
+    A byte-identical frame reuses everything and is not even decoded; a
+    perceptually identical one is decoded for the cheap metrics (motion
+    keeps feeding the spoof streaks) but reuses the face result.
+    """
+
+    def __init__(self, size=FRAME_CACHE_SIZE, phash_bits=FRAME_CACHE_PHASH_BITS,
+                 max_reuse=FRAME_CACHE_MAX_REUSE):
+        self.size = size
+        self.phash_bits = phash_bits
+        self.max_reuse = max_reuse
+        self.lookups = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.saved_seconds = 0.0
+        self._decode_cost = 0.0
+        self._detect_cost = 0.0
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def session(self, session_id):
+        """The session's cache, handed to the analyzer with its frame. None when disabled."""
+        if self.size <= 0:
+            return None
+        cache = self._sessions.get(session_id)
+        if cache is None:
+            cache = self._sessions[session_id] = {"entries": [], "reuse": 0}
+        return cache
+
+    def forget(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    # ---------- called from analyzer workers ----------
+    def find_exact(self, cache, digest):
+        with self._lock:
+            self.lookups += 1
+            for entry in cache["entries"]:
+                if entry["digest"] == digest:
+                    self.exact_hits += 1
+                    self.saved_seconds += self._decode_cost + self._detect_cost
+                    return entry
+        return None
+
+    def find_similar(self, cache, phash):
+        if self.phash_bits < 0 or cache["reuse"] >= self.max_reuse:
+            return None
+        for entry in cache["entries"]:
+            if entry["phash"] is None:
+                continue
+            if (entry["phash"] ^ phash).bit_count() <= self.phash_bits:
+                cache["reuse"] += 1
+                with self._lock:
+                    self.similar_hits += 1
+                    self.saved_seconds += self._detect_cost
+                return entry
+        return None
+
+    def store(self, cache, digest, phash, metrics, thumb, detected):
+        entries = cache["entries"]
+        entries.insert(0, {
+            "digest": digest,
+            "phash": phash,
+            "metrics": {k: metrics[k] for k in ("faces", "boxes", "brightness", "blur")},
+            "thumb": thumb,
+        })
+        del entries[self.size:]
+        if detected:
+            cache["reuse"] = 0
+
+    def record_costs(self, decode_seconds, detect_seconds=None):
+        with self._lock:
+            self._decode_cost += _EMA * (decode_seconds - self._decode_cost)
+            if detect_seconds is not None:
+                self._detect_cost += _EMA * (detect_seconds - self._detect_cost)
+
+    def stats(self):
+        hits = self.exact_hits + self.similar_hits
+        return {
+            "sessions": len(self._sessions),
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "hit_rate": hits / self.lookups if self.lookups else 0.0,
+            "saved_ms": self.saved_seconds * 1000.0,
+        }
+
+
+frame_cache = FrameCache()
@@ -0,0 +1,54 @@
+import os
+import random
+
+# ===================== CONFIG =====================
+# Client frame intervals handed out with every verdict. The floor stays above
+# the 2 s skip window in process_frame so paced frames are never skipped.
+PACE_MIN_MS = int(os.getenv("PROCTOR_PACE_MIN_MS", "2500"))
+PACE_BASE_MS = int(os.getenv("PROCTOR_PACE_BASE_MS", "5000"))
+PACE_MAX_MS = int(os.getenv("PROCTOR_PACE_MAX_MS", "15000"))
+PACE_JITTER = 0.1
+
+# Seconds a violation keeps a session at the fast rate
+RECENT_VIOLATION_SECONDS = 60
+# Consecutive frames with every streak at zero before a session counts as steady
+STEADY_FRAMES = 6
+
+
+# ===================== RISK =====================
+def session_risk(state, now):
+    """"high" while anything suspicious is building up, "low" once steady."""
+    last = state["last_violation_at"]
+    if last is not None and now - last < RECENT_VIOLATION_SECONDS:
+        return "high"
+    if (
+        state["no_face_since"] is not None
+        or state["dark_frame_count"] > 0
+        or state["multi_face_count"] > 0
+        or state["low_motion_streak"] >= 2
+        or state["blur_streak"] >= 2
+    ):
+        return "high"
+    if state["clean_frames"] >= STEADY_FRAMES:
+        return "low"
+    return "normal"
+
+
+def next_interval_ms(risk, load):
+    """Interval for the client's next frame.
+
+    load is the analyzer's pending/queue_depth ratio. Risky sessions keep
+    the fastest rate whatever the load; the rest back off as the queue
+    fills, steady ones first and furthest. Jitter spreads out clients that
+    started together.
+    """
+    load = min(max(load, 0.0), 1.0)
+    if risk == "high":
+        interval = PACE_MIN_MS
+    elif risk == "low":
+        interval = PACE_BASE_MS * 1.5 * (1 + 3 * load)
+    else:
+        interval = PACE_BASE_MS * (1 + 2 * load)
+
+    interval *= random.uniform(1 - PACE_JITTER, 1 + PACE_JITTER)
+    return int(min(max(interval, PACE_MIN_MS), PACE_MAX_MS))
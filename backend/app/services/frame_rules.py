@@ -0,0 +1,101 @@
+import os
+
+from app.services.frame_pacer import session_risk
+
+# ===================== THRESHOLDS =====================
+# Tune offline with app.services.replay before changing these live
+FRAME_RULES = {
+    # CAMERA_COVERED: this many frames in a row darker than dark_brightness
+    "dark_brightness": float(os.getenv("PROCTOR_RULE_DARK_BRIGHTNESS", "10")),
+    "dark_frames": int(os.getenv("PROCTOR_RULE_DARK_FRAMES", "5")),
+    # LEFT_SEAT: no face for this many seconds
+    "no_face_seconds": float(os.getenv("PROCTOR_RULE_NO_FACE_SECONDS", "15")),
+    # MULTIPLE_FACES: this many frames in a row with more than one face
+    "multi_face_frames": int(os.getenv("PROCTOR_RULE_MULTI_FACE_FRAMES", "4")),
+    # SPOOF_ATTACK: a streak of near-static or very blurry frames
+    "low_motion": float(os.getenv("PROCTOR_RULE_LOW_MOTION", "0.5")),
+    "low_motion_frames": int(os.getenv("PROCTOR_RULE_LOW_MOTION_FRAMES", "5")),
+    "low_blur": float(os.getenv("PROCTOR_RULE_LOW_BLUR", "15")),
+    "blur_frames": int(os.getenv("PROCTOR_RULE_BLUR_FRAMES", "5")),
+}
+
+
+# ===================== SPOOF DETECTION =====================
+# Image metrics (brightness, motion, blur) are computed off the event loop
+# by app.services.frame_analyzer; only the streak logic runs here.
+# A metric is None when its stage was disabled or skipped; its streak is
+# then left as it was and cannot fire on this frame.
+def detect_spoof(motion, blur, state, rules=FRAME_RULES):
+    spoof = False
+
+    # Low motion or very blurry frames over consecutive checks indicate static replay
+    if motion is not None:
+        if motion < rules["low_motion"]:
+            state["low_motion_streak"] += 1
+        else:
+            state["low_motion_streak"] = 0
+        spoof = state["low_motion_streak"] >= rules["low_motion_frames"]
+
+    if blur is not None:
+        if blur < rules["low_blur"]:
+            state["blur_streak"] += 1
+        else:
+            state["blur_streak"] = 0
+        spoof = spoof or state["blur_streak"] >= rules["blur_frames"]
+
+    return spoof
+
+
+# ===================== FRAME RULES =====================
+def apply_frame_rules(state, metrics, now, rules=FRAME_RULES):
+    """Advance a session's streak counters with one frame's metrics.
+
+    Returns the violation type raised by this frame, or None. When several
+    rules fire on one frame the later one wins: CAMERA_COVERED, LEFT_SEAT,
+    MULTIPLE_FACES, then SPOOF_ATTACK. app.services.replay mirrors this
+    order.
+    """
+    faces_count = metrics["faces"]
+    violation = None
+
+    if metrics["brightness"] is not None:
+        if metrics["brightness"] < rules["dark_brightness"]:
+            state["dark_frame_count"] += 1
+            if state["dark_frame_count"] >= rules["dark_frames"]:
+                violation = "CAMERA_COVERED"
+        else:
+            state["dark_frame_count"] = 0
+
+    if faces_count is not None:
+        # No face
+        if faces_count == 0:
+            if state["no_face_since"] is None:
+                state["no_face_since"] = now
+            elif now - state["no_face_since"] >= rules["no_face_seconds"]:
+                violation = "LEFT_SEAT"
+        else:
+            state["no_face_since"] = None
+
+        # Multiple faces
+        if faces_count > 1:
+            state["multi_face_count"] += 1
+            if state["multi_face_count"] >= rules["multi_face_frames"]:
+                violation = "MULTIPLE_FACES"
+        else:
+            state["multi_face_count"] = 0
+
+    # Spoof detection using motion + blur streaks
+    if detect_spoof(metrics["motion"], metrics["blur"], state, rules):
+        violation = "SPOOF_ATTACK"
+        state["total_violations"] += 2
+
+    if violation:
+        state["total_violations"] += 1
+        state["last_violation_at"] = now
+
+    if session_risk(state, now) == "high":
+        state["clean_frames"] = 0
+    else:
+        state["clean_frames"] += 1
+
+    return violation
@@ -0,0 +1,103 @@
+import os
+import threading
+
+import numpy as np
+
+from app.services.write_buffer import write_buffer
+
+# ===================== CONFIG =====================
+# Keep a compact per-frame metric trace of every analyzed frame, for
+# offline threshold tuning with app.services.replay
+TRACES_ENABLED = os.getenv("PROCTOR_TRACES", "1") == "1"
+# Frames packed into one stored chunk (150 is about five minutes at 2 s)
+TRACE_CHUNK_FRAMES = int(os.getenv("PROCTOR_TRACE_CHUNK", "150"))
+
+# One record per analyzed frame, 21 bytes. A metric whose stage was
+# disabled or skipped is stored as NaN (faces: -1).
+TRACE_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("faces", "i1"),
+    ("brightness", "<f4"),
+    ("motion", "<f4"),
+    ("blur", "<f4"),
+])
+
+
+def pack(rows):
+    return np.array(rows, dtype=TRACE_DTYPE).tobytes()
+
+
+def unpack(data):
+    return np.frombuffer(data, dtype=TRACE_DTYPE)
+
+
+def _value(metric):
+    return float("nan") if metric is None else metric
+
+
+# ===================== RECORDER =====================
+class FrameTraceRecorder:
+    """Collects each session's frame metrics and stores them in chunks.
+
+    A chunk goes to the write buffer once it holds `chunk_frames` frames,
+    when the session leaves this worker's store, and at shutdown. With
+    several workers a session's chunks may interleave in time; readers
+    sort by frame time.
+    """
+
+    def __init__(self, enabled=TRACES_ENABLED, chunk_frames=TRACE_CHUNK_FRAMES):
+        self.enabled = enabled
+        self.chunk_frames = chunk_frames
+        self.frames = 0
+        self.chunks = 0
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id, now, metrics):
+        if not self.enabled:
+            return
+        row = (
+            now,
+            -1 if metrics["faces"] is None else min(metrics["faces"], 127),
+            _value(metrics["brightness"]),
+            _value(metrics["motion"]),
+            _value(metrics["blur"]),
+        )
+        with self._lock:
+            rows = self._open.setdefault(session_id, [])
+            rows.append(row)
+            self.frames += 1
+            if len(rows) < self.chunk_frames:
+                return
+            del self._open[session_id]
+        self._store(session_id, rows)
+
+    def forget(self, session_id):
+        with self._lock:
+            rows = self._open.pop(session_id, None)
+        if rows:
+            self._store(session_id, rows)
+
+    def drain(self):
+        with self._lock:
+            pending, self._open = self._open, {}
+        for session_id, rows in pending.items():
+            self._store(session_id, rows)
+
+    def _store(self, session_id, rows):
+        write_buffer.add_trace(session_id, rows[0][0], len(rows), pack(rows))
+        self.chunks += 1
+
+    def stats(self):
+        with self._lock:
+            open_frames = sum(len(rows) for rows in self._open.values())
+        return {
+            "enabled": self.enabled,
+            "frames": self.frames,
+            "chunks": self.chunks,
+            "open_sessions": len(self._open),
+            "open_frames": open_frames,
+        }
+
+
+frame_traces = FrameTraceRecorder()
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.services.face_utils import FACE_MATCH_THRESHOLD, face_distances, identity_available
+
+# ===================== CONFIG =====================
+# Seconds between identity checks for one session; 0 disables them
+IDENTITY_CHECK_EVERY = float(os.getenv("PROCTOR_IDENTITY_CHECK_EVERY", "60"))
+IDENTITY_THRESHOLD = float(os.getenv("PROCTOR_IDENTITY_THRESHOLD", str(FACE_MATCH_THRESHOLD)))
+# How often queued live embeddings are compared, in one batch
+IDENTITY_TICK = float(os.getenv("PROCTOR_IDENTITY_TICK", "1.0"))
+
+
+# ===================== VERIFIER =====================
+class IdentityVerifier:
+    """Reference embeddings per session and scheduled live checks.
+
+    Live embeddings are queued by the frame path and compared once per tick
+    for every due session at once: one (n, 128) subtraction and norm.
+    on_mismatch(session_id, distance) is awaited for each impostor.
+    """
+
+    def __init__(self, every=IDENTITY_CHECK_EVERY, threshold=IDENTITY_THRESHOLD, tick=IDENTITY_TICK):
+        self.every = every
+        self.threshold = threshold
+        self.tick = tick
+        self.on_mismatch = None
+        self.checks = 0
+        self.mismatches = 0
+        self.batches = 0
+        self._refs = {}
+        self._next_due = {}
+        self._pending = {}
+        self._notices = set()
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self.every > 0 and identity_available()
+
+    # ---------- references ----------
+    def set_reference(self, session_id, embedding, now=None):
+        """embedding may be None to remember that the session has no reference."""
+        now = time.time() if now is None else now
+        self._refs[session_id] = None if embedding is None else np.asarray(embedding, np.float32)
+        self._next_due[session_id] = now + self.every
+
+    def has_reference(self, session_id):
+        """True/False once known, None when it still has to be loaded."""
+        if session_id not in self._refs:
+            return None
+        return self._refs[session_id] is not None
+
+    def forget(self, session_id):
+        self._refs.pop(session_id, None)
+        self._next_due.pop(session_id, None)
+        self._pending.pop(session_id, None)
+        self._notices.discard(session_id)
+
+    # ---------- schedule ----------
+    def due(self, session_id, now):
+        if not self.enabled or self._refs.get(session_id) is None:
+            return False
+        return now >= self._next_due.get(session_id, 0) and session_id not in self._pending
+
+    def submit(self, session_id, live, now):
+        if self._refs.get(session_id) is None:
+            return
+        self._pending[session_id] = np.asarray(live, np.float32)
+        self._next_due[session_id] = now + self.every
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    # ---------- batched check ----------
+    def check_pending(self):
+        """Compare every queued live embedding with its reference. Returns mismatches."""
+        pending, self._pending = self._pending, {}
+        ids = [sid for sid in pending if self._refs.get(sid) is not None]
+        if not ids:
+            return []
+
+        refs = np.stack([self._refs[sid] for sid in ids])
+        lives = np.stack([pending[sid] for sid in ids])
+        distances = face_distances(refs, lives)
+
+        self.batches += 1
+        self.checks += len(ids)
+        mismatches = [(sid, float(d)) for sid, d in zip(ids, distances) if d >= self.threshold]
+        self.mismatches += len(mismatches)
+        self._notices.update(sid for sid, _ in mismatches)
+        return mismatches
+
+    def take_notice(self, session_id):
+        """True once after a mismatch, so the candidate's next verdict can show it."""
+        if session_id in self._notices:
+            self._notices.discard(session_id)
+            return True
+        return False
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.tick)
+            for session_id, distance in self.check_pending():
+                if self.on_mismatch is not None:
+                    await self.on_mismatch(session_id, distance)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "references": sum(1 for ref in self._refs.values() if ref is not None),
+            "checks": self.checks,
+            "mismatches": self.mismatches,
+            "avg_batch": self.checks / self.batches if self.batches else 0.0,
+        }
+
+
+identity = IdentityVerifier()
@@ -0,0 +1,170 @@
+import heapq
+import os
+import threading
+import time
+from collections import deque
+
+from app.services.scoring import confidence, penalty
+from app.services.session_store import SESSION_STORE_TTL
+
+# ===================== CONFIG =====================
+# Violations younger than this count as "recent" on the dashboard
+DASHBOARD_WINDOW_MIN = float(os.getenv("PROCTOR_DASHBOARD_WINDOW_MIN", "10"))
+# Lowest-confidence sessions listed per exam
+DASHBOARD_LOWEST = int(os.getenv("PROCTOR_DASHBOARD_LOWEST", "10"))
+# Seconds between scans for idle sessions
+IDLE_SWEEP_EVERY = 30.0
+
+
+# ===================== LIVE STATS =====================
+class LiveStats:
+    """Per-exam counters for the admin dashboard, updated as events happen.
+
+    Every change stamps its exam with a new global version, so a client that
+    saw version X only needs the exams stamped after it. Recent-violation
+    windows and idle sessions expire lazily when a snapshot is taken; an
+    expiry is a change like any other.
+
+    Counters are per process; with several workers each reports its own
+    sessions.
+    """
+
+    def __init__(self, window_min=DASHBOARD_WINDOW_MIN, lowest=DASHBOARD_LOWEST,
+                 idle_seconds=SESSION_STORE_TTL):
+        self.window = window_min * 60.0
+        self.lowest = lowest
+        self.idle_seconds = idle_seconds
+        self.version = 0
+        self._next_sweep = 0.0
+        self._exams = {}
+        self._session_exam = {}
+        self._lock = threading.Lock()
+
+    def _exam(self, exam_id):
+        exam = self._exams.get(exam_id)
+        if exam is None:
+            exam = self._exams[exam_id] = {"sessions": {}, "recent": deque(), "version": 0, "row": None}
+        return exam
+
+    def _changed(self, exam):
+        # Caller holds _lock
+        self.version += 1
+        exam["version"] = self.version
+        exam["row"] = None
+
+    # ---------- events ----------
+    def known(self, session_id):
+        return session_id in self._session_exam
+
+    def exam_of(self, session_id):
+        return self._session_exam.get(session_id)
+
+    def session_started(self, exam_id, session_id, user_id, penalty_total=0, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            exam = self._exam(exam_id)
+            exam["sessions"][session_id] = {
+                "user_id": user_id, "penalty_total": penalty_total, "last_seen": now,
+            }
+            self._session_exam[session_id] = exam_id
+            self._changed(exam)
+
+    def touch(self, session_id, now=None):
+        exam_id = self._session_exam.get(session_id)
+        session = self._exams[exam_id]["sessions"].get(session_id) if exam_id is not None else None
+        if session is not None:
+            session["last_seen"] = time.time() if now is None else now
+
+    def violation(self, session_id, violation_type, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            exam_id = self._session_exam.get(session_id)
+            if exam_id is None:
+                return
+            exam = self._exams[exam_id]
+            exam["sessions"][session_id]["penalty_total"] += penalty(violation_type)
+            exam["recent"].append(now)
+            self._changed(exam)
+
+    def session_ended(self, session_id):
+        with self._lock:
+            exam_id = self._session_exam.pop(session_id, None)
+            if exam_id is None:
+                return
+            exam = self._exams[exam_id]
+            exam["sessions"].pop(session_id, None)
+            self._changed(exam)
+
+    # ---------- snapshot ----------
+    def _expire(self, exam, now, sweep_idle):
+        # Caller holds _lock
+        changed = False
+        while exam["recent"] and now - exam["recent"][0] > self.window:
+            exam["recent"].popleft()
+            changed = True
+        idle = []
+        if sweep_idle:
+            idle = [sid for sid, s in exam["sessions"].items() if now - s["last_seen"] > self.idle_seconds]
+        for session_id in idle:
+            del exam["sessions"][session_id]
+            self._session_exam.pop(session_id, None)
+            changed = True
+        if changed:
+            self._changed(exam)
+
+    def _row(self, exam_id, exam):
+        # Rebuilt only for exams that changed since the last snapshot
+        if exam["row"] is None:
+            lowest = heapq.nsmallest(
+                self.lowest, exam["sessions"].items(),
+                key=lambda item: (-item[1]["penalty_total"], item[0]),
+            )
+            exam["row"] = {
+                "exam_id": exam_id,
+                "version": exam["version"],
+                "active_sessions": len(exam["sessions"]),
+                "recent_violations": len(exam["recent"]),
+                "lowest_confidence": [
+                    {
+                        "session_id": session_id,
+                        "user_id": s["user_id"],
+                        "confidence_score": confidence(s["penalty_total"]),
+                    }
+                    for session_id, s in lowest
+                ],
+            }
+        return exam["row"]
+
+    def snapshot(self, since=None, now=None):
+        """Every exam, or only those changed after version `since`."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if since is not None and since > self.version:
+                # Versions restart with the process; the client is ahead of us
+                since = None
+            sweep_idle = now >= self._next_sweep
+            if sweep_idle:
+                self._next_sweep = now + IDLE_SWEEP_EVERY
+            for exam in self._exams.values():
+                self._expire(exam, now, sweep_idle)
+            rows = [
+                self._row(exam_id, exam)
+                for exam_id, exam in self._exams.items()
+                if since is None or exam["version"] > since
+            ]
+            return {
+                "version": self.version,
+                "full": since is None,
+                "window_minutes": self.window / 60.0,
+                "exams": rows,
+            }
+
+    def stats(self):
+        return {
+            "exams": len(self._exams),
+            "sessions": len(self._session_exam),
+            "version": self.version,
+        }
+
+
+live_stats = LiveStats()
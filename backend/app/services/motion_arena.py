@@ -0,0 +1,117 @@
+import os
+import threading
+
+import numpy as np
+
+from app.services.session_store import SESSION_STORE_MAX
+
+# ===================== CONFIG =====================
+MOTION_ARENA_SLOTS = int(os.getenv("PROCTOR_MOTION_ARENA_SLOTS", str(SESSION_STORE_MAX)))
+MOTION_THUMB_WIDTH = int(os.getenv("PROCTOR_MOTION_THUMB_WIDTH", "80"))
+MOTION_THUMB_HEIGHT = int(os.getenv("PROCTOR_MOTION_THUMB_HEIGHT", "60"))
+
+
+# ===================== ARENA =====================
+class MotionArena:
+    """Previous-frame thumbnails for every session in one preallocated array.
+
+    Thumbnails are a nearest-neighbour subsample of the grayscale frame, not
+    an area average: the mean absdiff over a subsample is an unbiased estimate
+    of the full-frame mean absdiff, so the motion thresholds keep their meaning.
+    Slots are handed out on the event loop; a slot's pixels are only written
+    by the worker analyzing that session's current frame.
+    """
+
+    def __init__(self, slots=MOTION_ARENA_SLOTS, width=MOTION_THUMB_WIDTH, height=MOTION_THUMB_HEIGHT):
+        self.width = width
+        self.height = height
+        # np.zeros is calloc-backed: pages are only committed once a slot is used
+        self.frames = np.zeros((slots, height, width), np.uint8)
+        self.valid = np.zeros(slots, bool)
+        self.exhausted = 0
+        self._slots = {}
+        self._free = list(range(slots - 1, -1, -1))
+        self._index = {}
+        self._index_lock = threading.Lock()
+
+    # ---------- slots ----------
+    def slot(self, session_id):
+        """Slot for a session, allocating one on first use. None when full."""
+        slot = self._slots.get(session_id)
+        if slot is None:
+            if not self._free:
+                self.exhausted += 1
+                return None
+            slot = self._free.pop()
+            self.valid[slot] = False
+            self._slots[session_id] = slot
+        return slot
+
+    def release(self, session_id):
+        slot = self._slots.pop(session_id, None)
+        if slot is not None:
+            self.valid[slot] = False
+            self._free.append(slot)
+
+    # ---------- motion ----------
+    def _sample_index(self, h, w):
+        key = (h, w)
+        index = self._index.get(key)
+        if index is None:
+            with self._index_lock:
+                rows = (np.arange(self.height) * h // self.height)[:, None]
+                cols = np.arange(self.width) * w // self.width
+                index = self._index[key] = (rows, cols)
+        return index
+
+    def thumbnail(self, gray):
+        rows, cols = self._sample_index(*gray.shape)
+        return gray[rows, cols]
+
+    def update(self, slot, gray):
+        """Motion score of gray against the slot's previous thumbnail, then store it."""
+        if slot is None:
+            return 255.0
+        return self.update_thumbnail(slot, self.thumbnail(gray))
+
+    def update_thumbnail(self, slot, thumb):
+        if slot is None:
+            return 255.0
+        motion = 255.0
+        if self.valid[slot]:
+            motion = float(np.abs(self.frames[slot].astype(np.int16) - thumb).mean())
+        self.frames[slot] = thumb
+        self.valid[slot] = True
+        return motion
+
+    def update_many(self, slots, grays):
+        """Vectorized update() for an (n, h, w) stack; slots may contain None."""
+        motion = np.full(len(slots), 255.0)
+        live = [k for k, slot in enumerate(slots) if slot is not None]
+        if not live:
+            return motion
+
+        rows, cols = self._sample_index(*grays.shape[1:])
+        thumbs = grays[live][:, rows, cols]
+        idx = np.array([slots[k] for k in live])
+
+        had_prev = self.valid[idx]
+        diff = np.abs(self.frames[idx].astype(np.int16) - thumbs).mean(axis=(1, 2))
+        motion[live] = np.where(had_prev, diff, 255.0)
+
+        self.frames[idx] = thumbs
+        self.valid[idx] = True
+        return motion
+
+    def stats(self):
+        return {
+            "slots": len(self.frames),
+            "used": len(self._slots),
+            "thumb": f"{self.width}x{self.height}",
+            "bytes_per_session": self.width * self.height,
+            "reserved_bytes": self.frames.nbytes,
+            "exhausted": self.exhausted,
+        }
+
+
+arena = MotionArena()
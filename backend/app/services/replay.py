@@ -0,0 +1,269 @@
+"""Offline replay of the frame rules over stored metric traces.
+
+Re-runs app.services.frame_rules over every session's per-frame trace
+(recorded by app.services.frame_traces) with alternative thresholds, and
+reports how violation counts and confidence scores would change. Run from
+backend/:
+
+    python -m app.services.replay --exam 7 \\
+        --grid dark_frames=3,5,8 --grid no_face_seconds=10,15,30 \\
+        --grid multi_face_frames=2,4,6 --grid low_blur=10,15,20
+
+Each rule is a streak over the frame sequence, so its state at every frame
+can be computed for all sessions at once with cumulative sums over a
+(sessions x frames) matrix instead of stepping frame by frame. A rule's
+per-frame firing mask depends only on its own thresholds: masks are
+computed once per distinct value and bit-packed, and each combination of
+a sweep only ANDs and ORs them and counts bits.
+"""
+import argparse
+import itertools
+import json
+
+import numpy as np
+
+from app.services.frame_rules import FRAME_RULES
+from app.services.frame_traces import unpack
+from app.services.scoring import penalty
+
+# Frame-rule violations in the order apply_frame_rules lets them override
+# one another: on a frame where several fire, the last one is recorded
+RULE_TYPES = ("CAMERA_COVERED", "LEFT_SEAT", "MULTIPLE_FACES", "SPOOF_ATTACK")
+
+# Set bits per byte value, for counting packed masks
+_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+# ===================== LOADING =====================
+def load_traces(db, exam_id=None, session_ids=None):
+    """session_id -> trace records in frame-time order."""
+    from app.models_proctor import ProctorFrameTrace, ProctorSession
+
+    query = db.query(ProctorFrameTrace.session_id, ProctorFrameTrace.data)
+    if exam_id is not None:
+        query = query.join(
+            ProctorSession, ProctorSession.id == ProctorFrameTrace.session_id
+        ).filter(ProctorSession.exam_id == exam_id)
+    if session_ids is not None:
+        query = query.filter(ProctorFrameTrace.session_id.in_(list(session_ids)))
+
+    chunks = {}
+    for session_id, data in query.order_by(ProctorFrameTrace.id):
+        chunks.setdefault(session_id, []).append(unpack(data))
+    traces = {}
+    for session_id, parts in chunks.items():
+        trace = np.concatenate(parts)
+        traces[session_id] = trace[np.argsort(trace["t"], kind="stable")]
+    return traces
+
+
+def load_penalties(db, session_ids):
+    """session_id -> stored penalty_total, for scoring what-ifs."""
+    from app.models_proctor import ProctorSessionScore
+
+    rows = db.query(ProctorSessionScore.session_id, ProctorSessionScore.penalty_total).filter(
+        ProctorSessionScore.session_id.in_(list(session_ids))
+    )
+    return {session_id: penalty_total for session_id, penalty_total in rows}
+
+
+# ===================== STREAKS =====================
+def _streaks(hit, valid):
+    """Length of the run of hits ending at each frame.
+
+    A valid frame without a hit resets the run; an invalid frame (metric
+    missing) leaves it as it was, as apply_frame_rules does.
+    """
+    count = np.cumsum(hit, axis=1, dtype=np.int32)
+    base = np.maximum.accumulate(np.where(valid & ~hit, count, 0), axis=1)
+    return count - base
+
+
+class Replay:
+    """Traces of many sessions, padded into (sessions x frames) matrices."""
+
+    def __init__(self, traces):
+        self.session_ids = list(traces)
+        width = max((len(trace) for trace in traces.values()), default=0)
+        shape = (len(self.session_ids), width)
+        self.t = np.full(shape, np.nan)
+        self.faces = np.full(shape, -1, dtype=np.int8)
+        self.brightness = np.full(shape, np.nan, dtype=np.float32)
+        self.motion = np.full(shape, np.nan, dtype=np.float32)
+        self.blur = np.full(shape, np.nan, dtype=np.float32)
+        for row, session_id in enumerate(self.session_ids):
+            trace = traces[session_id]
+            for name in ("t", "faces", "brightness", "motion", "blur"):
+                getattr(self, name)[row, :len(trace)] = trace[name]
+        self.frames = sum(len(trace) for trace in traces.values())
+        self._streak_cache = {}
+        self._mask_cache = {}
+
+    # ---------- per-rule masks ----------
+    def _cached(self, cache, key, build):
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build()
+        return value
+
+    def _below(self, name, values, threshold):
+        # NaN compares False, so missing metrics never hit
+        def build():
+            hit = values < threshold
+            return hit, _streaks(hit, ~np.isnan(values))
+        return self._cached(self._streak_cache, (name, threshold), build)
+
+    def _count_mask(self, name, values, threshold, frames):
+        def build():
+            hit, streak = self._below(name, values, threshold)
+            return np.packbits(hit & (streak >= frames), axis=1)
+        return self._cached(self._mask_cache, (name, threshold, frames), build)
+
+    def _left_seat(self, seconds):
+        def build():
+            def streaks():
+                hit = self.faces == 0
+                streak = _streaks(hit, self.faces >= 0)
+                # Time the current no-face run began; frame times only increase
+                since = np.fmax.accumulate(np.where(hit & (streak == 1), self.t, np.nan), axis=1)
+                return hit, streak, since
+            hit, streak, since = self._cached(self._streak_cache, ("no_face",), streaks)
+            fires = hit & (streak >= 2) & (self.t - since >= seconds)
+            return np.packbits(fires, axis=1)
+        return self._cached(self._mask_cache, ("no_face", seconds), build)
+
+    def _multi_face(self, frames):
+        def build():
+            def streaks():
+                hit = self.faces > 1
+                return hit, _streaks(hit, self.faces >= 0)
+            hit, streak = self._cached(self._streak_cache, ("multi_face",), streaks)
+            return np.packbits(hit & (streak >= frames), axis=1)
+        return self._cached(self._mask_cache, ("multi_face", frames), build)
+
+    # ---------- replay ----------
+    def counts(self, rules):
+        """(sessions x len(RULE_TYPES)) violations each session would record."""
+        dark = self._count_mask("dark", self.brightness, rules["dark_brightness"], rules["dark_frames"])
+        left = self._left_seat(rules["no_face_seconds"])
+        multi = self._multi_face(rules["multi_face_frames"])
+        spoof = (
+            self._count_mask("motion", self.motion, rules["low_motion"], rules["low_motion_frames"])
+            | self._count_mask("blur", self.blur, rules["low_blur"], rules["blur_frames"])
+        )
+        # The last rule to fire on a frame is the one recorded
+        above = spoof
+        recorded = [spoof]
+        for mask in (multi, left):
+            recorded.append(mask & ~above)
+            above = above | mask
+        recorded.append(dark & ~above)
+        recorded.reverse()
+        return np.stack([_BITS[mask].sum(axis=1, dtype=np.int64) for mask in recorded], axis=1)
+
+    def sweep(self, grid, base=FRAME_RULES, stored_penalties=None, flag_below=50):
+        """Replay every combination of `grid` (rule name -> values).
+
+        Returns the baseline (the `base` thresholds) and one result per
+        combination. Scores start from each session's stored penalty,
+        swapping the baseline's frame-rule penalties for the candidate's;
+        browser and identity violations are left as they are.
+        """
+        weights = np.array([penalty(t) for t in RULE_TYPES])
+        base_counts = self.counts(base)
+        base_penalty = base_counts @ weights
+        if stored_penalties is None:
+            stored = base_penalty
+        else:
+            stored = np.array([stored_penalties.get(sid, 0) for sid in self.session_ids])
+        other_penalty = np.maximum(stored - base_penalty, 0)
+
+        def scores(counts):
+            return np.clip(100 - other_penalty - counts @ weights, 0, 100)
+
+        base_scores = scores(base_counts)
+
+        def result(rules, counts):
+            score = scores(counts)
+            return {
+                "rules": rules,
+                "violations": dict(zip(RULE_TYPES, counts.sum(axis=0).tolist())),
+                "total_violations": int(counts.sum()),
+                "mean_confidence": float(score.mean()) if len(score) else 100.0,
+                "flagged": int((score < flag_below).sum()),
+                "sessions_changed": int((score != base_scores).sum()),
+                "mean_confidence_delta": float((score - base_scores).mean()) if len(score) else 0.0,
+            }
+
+        names = list(grid)
+        results = []
+        for values in itertools.product(*(grid[name] for name in names)):
+            rules = {**base, **dict(zip(names, values))}
+            results.append(result(rules, self.counts(rules)))
+        return result(dict(base), base_counts), results
+
+
+# ===================== CLI =====================
+def _parse_grid(specs):
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in FRAME_RULES:
+            raise SystemExit(f"unknown rule {name!r}; one of {', '.join(FRAME_RULES)}")
+        cast = type(FRAME_RULES[name])
+        grid[name] = [cast(v) for v in values.split(",") if v]
+    return grid
+
+
+def print_sweep(baseline, results, limit=20, sort="total_violations"):
+    changed = [name for name in FRAME_RULES if any(r["rules"][name] != baseline["rules"][name] for r in results)]
+    header = "".join(f"{name:>18}" for name in changed)
+    print(f"{header} {'violations':>11} {'Δ':>7} {'mean conf':>10} {'flagged':>8} {'changed':>8}")
+
+    def line(r):
+        cells = "".join(f"{r['rules'][name]:>18g}" for name in changed)
+        delta = r["total_violations"] - baseline["total_violations"]
+        print(f"{cells} {r['total_violations']:>11} {delta:>+7} {r['mean_confidence']:>10.1f}"
+              f" {r['flagged']:>8} {r['sessions_changed']:>8}")
+
+    line(baseline)
+    print("-" * (len(header) + 48))
+    for r in sorted(results, key=lambda r: r[sort])[:limit]:
+        line(r)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay frame rules over stored traces")
+    parser.add_argument("--exam", type=int, help="only this exam's sessions")
+    parser.add_argument("--grid", action="append", default=[], metavar="RULE=V1,V2,...",
+                        help="threshold values to sweep; repeat per rule")
+    parser.add_argument("--flag-below", type=float, default=50, help="confidence counted as flagged")
+    parser.add_argument("--sort", default="total_violations",
+                        choices=("total_violations", "flagged", "sessions_changed", "mean_confidence"))
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print every result as JSON")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        traces = load_traces(db, args.exam)
+        penalties = load_penalties(db, traces)
+    finally:
+        db.close()
+    if not traces:
+        raise SystemExit("no frame traces stored")
+
+    replay = Replay(traces)
+    baseline, results = replay.sweep(_parse_grid(args.grid), stored_penalties=penalties,
+                                     flag_below=args.flag_below)
+    if args.json:
+        print(json.dumps({"baseline": baseline, "results": results}, indent=2))
+        return
+    print(f"{len(traces)} sessions, {replay.frames} frames, {len(results)} combinations")
+    print_sweep(baseline, results, args.limit, args.sort)
+
+
+if __name__ == "__main__":
+    main()
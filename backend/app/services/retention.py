@@ -0,0 +1,179 @@
+"""Retention for proctor_violations: roll up, archive, delete.
+
+Raw violation rows of sessions that started more than the retention age
+ago are folded into proctor_violation_summaries (count, first and last
+time, and a per-minute histogram for each session and type). They are
+then written to gzip-compressed JSON-lines archives and deleted. Scores
+do not change: they are read from proctor_session_scores, and
+rebuild_scores counts the summaries too. Evidence thumbnails of archived
+rows are no longer referenced, so the next evidence compaction reclaims
+them. Run from backend/:
+
+    python -m app.services.retention                  # PROCTOR_VIOLATION_RETENTION_DAYS
+    python -m app.services.retention --days 30 --dry-run
+"""
+import argparse
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, func
+
+from app.models_proctor import ProctorSession, ProctorViolation, ProctorViolationSummary
+
+# ===================== CONFIG =====================
+# Sessions that started longer ago than this are compacted
+VIOLATION_RETENTION_DAYS = float(os.getenv("PROCTOR_VIOLATION_RETENTION_DAYS", "90"))
+VIOLATION_ARCHIVE_DIR = os.getenv("PROCTOR_VIOLATION_ARCHIVE_DIR", "./proctor_archive")
+# Sessions rolled up, archived and deleted per transaction
+VIOLATION_COMPACT_BATCH = int(os.getenv("PROCTOR_VIOLATION_COMPACT_BATCH", "500"))
+
+
+# ===================== ROLLUP =====================
+def _minute(ts):
+    return ts.replace(second=0, microsecond=0)
+
+
+def _roll_up(db, rows):
+    """Fold raw rows into their (session, type) summaries, creating or extending them."""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault((row.session_id, row.violation_type), []).append(row.timestamp)
+
+    existing = {
+        (s.session_id, s.violation_type): s
+        for s in db.query(ProctorViolationSummary).filter(
+            ProctorViolationSummary.session_id.in_(list({sid for sid, _ in grouped}))
+        )
+    }
+    for (session_id, violation_type), stamps in grouped.items():
+        summary = existing.get((session_id, violation_type))
+        if summary is None:
+            summary = ProctorViolationSummary(
+                session_id=session_id, violation_type=violation_type,
+                count=0, first_at=None, last_at=None, minute_histogram="{}",
+            )
+            db.add(summary)
+
+        # Histogram keys are minutes after first_at; work in absolute
+        # minutes since first_at may move earlier
+        buckets = Counter()
+        if summary.first_at is not None:
+            base = _minute(summary.first_at)
+            for offset, n in json.loads(summary.minute_histogram).items():
+                buckets[base + timedelta(minutes=int(offset))] += n
+        timed = [ts for ts in stamps if ts is not None]
+        buckets.update(_minute(ts) for ts in timed)
+
+        summary.count += len(stamps)
+        if timed:
+            summary.first_at = min([ts for ts in (summary.first_at, *timed) if ts is not None])
+            summary.last_at = max([ts for ts in (summary.last_at, *timed) if ts is not None])
+        if buckets:
+            base = _minute(summary.first_at)
+            summary.minute_histogram = json.dumps({
+                str(int((minute - base).total_seconds() // 60)): n
+                for minute, n in sorted(buckets.items())
+            })
+
+
+def _archive(archive_dir, rows):
+    """Write raw rows to a gzip JSON-lines file; returns its path once durable.
+
+    Named after the id range, so a batch retried after a failed delete
+    overwrites its own archive instead of duplicating it.
+    """
+    name = f"violations-{rows[0].id:012d}-{rows[-1].id:012d}.jsonl.gz"
+    path = os.path.join(archive_dir, name)
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps({
+                "id": row.id,
+                "session_id": row.session_id,
+                "violation_type": row.violation_type,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                "evidence_key": row.evidence_key,
+            }) + "\n")
+    with open(path + ".tmp", "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# ===================== COMPACTION =====================
+def compact_violations(db, older_than_days=VIOLATION_RETENTION_DAYS, archive_dir=VIOLATION_ARCHIVE_DIR,
+                       batch=VIOLATION_COMPACT_BATCH, now=None, dry_run=False):
+    """Roll up, archive and delete raw violations of sessions older than the cutoff.
+
+    Each batch of sessions is archived first and then summarized and
+    deleted in one transaction, so a failure leaves the raw rows in place
+    (and at worst an archive that the retry overwrites).
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    candidates = [
+        sid for (sid,) in db.query(ProctorSession.id).filter(
+            ProctorSession.started_at < cutoff,
+            exists().where(ProctorViolation.session_id == ProctorSession.id),
+        ).order_by(ProctorSession.id)
+    ]
+    result = {"sessions": 0, "rows": 0, "archives": []}
+
+    for start in range(0, len(candidates), batch):
+        session_ids = candidates[start:start + batch]
+        if dry_run:
+            result["sessions"] += len(session_ids)
+            result["rows"] += db.query(func.count(ProctorViolation.id)).filter(
+                ProctorViolation.session_id.in_(session_ids)
+            ).scalar()
+            continue
+
+        rows = db.query(
+            ProctorViolation.id, ProctorViolation.session_id, ProctorViolation.violation_type,
+            ProctorViolation.timestamp, ProctorViolation.evidence_key,
+        ).filter(ProctorViolation.session_id.in_(session_ids)).order_by(ProctorViolation.id).all()
+        if not rows:
+            continue
+
+        os.makedirs(archive_dir, exist_ok=True)
+        result["archives"].append(_archive(archive_dir, rows))
+        try:
+            _roll_up(db, rows)
+            # Only what was archived: a late flush for these sessions stays raw
+            db.execute(delete(ProctorViolation).where(
+                ProctorViolation.session_id.in_(session_ids),
+                ProctorViolation.id <= rows[-1].id,
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        result["sessions"] += len(session_ids)
+        result["rows"] += len(rows)
+    return result
+
+
+def main():
+    from app.database import SessionLocal, upgrade_schema
+
+    parser = argparse.ArgumentParser(description="Roll up and archive old proctoring violations")
+    parser.add_argument("--days", type=float, default=VIOLATION_RETENTION_DAYS,
+                        help="compact sessions that started longer ago than this")
+    parser.add_argument("--archive", default=VIOLATION_ARCHIVE_DIR, help="directory for the archives")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be compacted")
+    args = parser.parse_args()
+
+    upgrade_schema()
+    db = SessionLocal()
+    try:
+        result = compact_violations(db, args.days, args.archive, dry_run=args.dry_run)
+    finally:
+        db.close()
+    verb = "Would compact" if args.dry_run else "Compacted"
+    print(f"{verb} {result['rows']} violations of {result['sessions']} sessions"
+          + (f" into {len(result['archives'])} archives" if result["archives"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Per-session confidence scores, kept as running aggregates.
+
+Rebuild after changing VIOLATION_PENALTY (run from backend/):
+
+    python -m app.services.scoring            # every session
+    python -m app.services.scoring --exam 7   # one exam
+"""
+import argparse
+import json
+from collections import Counter
+
+from sqlalchemy import bindparam, func, select, update
+
+from app.models_proctor import (
+    ProctorSession, ProctorSessionScore, ProctorViolation, ProctorViolationSummary,
+)
+
+# ===================== CONFIDENCE SCORE CONFIG =====================
+VIOLATION_PENALTY = {
+    "TAB_SWITCH": 5,
+    "WINDOW_BLUR": 5,
+    "RIGHT_CLICK": 5,
+    "LEFT_SEAT": 15,
+    "MULTIPLE_FACES": 20,
+    "CAMERA_COVERED": 20,
+    "SPOOF_ATTACK": 30,
+    "IMPERSONATION": 40,
+    "DUPLICATE_CANDIDATE": 50,
+}
+DEFAULT_PENALTY = 5
+
+
+def penalty(violation_type):
+    return VIOLATION_PENALTY.get(violation_type, DEFAULT_PENALTY)
+
+
+def confidence(penalty_total):
+    return max(0, min(100, 100 - penalty_total))
+
+
+# ===================== AGGREGATES =====================
+def summarize(score, pending=()):
+    """Score, count and per-type counts of a session.
+
+    score is its ProctorSessionScore row (or None); pending are violation
+    types not yet written to the database.
+    """
+    counts = Counter(json.loads(score.type_counts) if score else {})
+    counts.update(pending)
+    penalty_total = (score.penalty_total if score else 0) + sum(penalty(t) for t in pending)
+    return {
+        "confidence_score": confidence(penalty_total),
+        "total_violations": (score.violation_count if score else 0) + len(pending),
+        "violation_counts": dict(counts),
+    }
+
+
+def record_violations(db, rows):
+    """Fold newly inserted violations into their sessions' aggregates.
+
+    rows: dicts with session_id and violation_type, already inserted. Runs
+    inside the caller's transaction so rows and aggregates commit together.
+    A session without a score row (started before scores were
+    materialized) gets one seeded from all its stored violations, these
+    rows included, so its history is not lost. The counters are
+    bumped with one UPDATE ... SET x = x + n per session first, which takes
+    the row lock, so the per-type JSON read-modify-write after it cannot
+    race another worker's flush.
+    """
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row["session_id"], Counter())[row["violation_type"]] += 1
+    if not grouped:
+        return
+
+    existing = {
+        sid for (sid,) in db.query(ProctorSessionScore.session_id).filter(
+            ProctorSessionScore.session_id.in_(grouped)
+        )
+    }
+    missing = grouped.keys() - existing
+    if missing:
+        seeded = {sid: Counter() for sid in missing}
+        for session_id, violation_type, n in db.query(
+            ProctorViolation.session_id, ProctorViolation.violation_type, func.count()
+        ).filter(ProctorViolation.session_id.in_(missing)).group_by(
+            ProctorViolation.session_id, ProctorViolation.violation_type
+        ):
+            seeded[session_id][violation_type] += n
+        for session_id, violation_type, n in db.query(
+            ProctorViolationSummary.session_id, ProctorViolationSummary.violation_type,
+            ProctorViolationSummary.count,
+        ).filter(ProctorViolationSummary.session_id.in_(missing)):
+            seeded[session_id][violation_type] += n
+        db.add_all(
+            ProctorSessionScore(
+                session_id=session_id,
+                penalty_total=sum(penalty(t) * n for t, n in c.items()),
+                violation_count=sum(c.values()),
+                type_counts=json.dumps(c),
+            )
+            for session_id, c in seeded.items()
+        )
+        db.flush()
+        # Already counted by the seed
+        grouped = {sid: c for sid, c in grouped.items() if sid not in missing}
+        if not grouped:
+            return
+
+    db.execute(
+        update(ProctorSessionScore.__table__)
+        .where(ProctorSessionScore.session_id == bindparam("sid"))
+        .values(
+            penalty_total=ProctorSessionScore.penalty_total + bindparam("add_penalty"),
+            violation_count=ProctorSessionScore.violation_count + bindparam("add_count"),
+        ),
+        [
+            {
+                "sid": session_id,
+                "add_penalty": sum(penalty(t) * n for t, n in counts.items()),
+                "add_count": sum(counts.values()),
+            }
+            for session_id, counts in grouped.items()
+        ],
+    )
+
+    scores = db.query(ProctorSessionScore).filter(
+        ProctorSessionScore.session_id.in_(grouped)
+    ).populate_existing().all()
+    for score in scores:
+        counts = Counter(json.loads(score.type_counts))
+        counts.update(grouped[score.session_id])
+        score.type_counts = json.dumps(counts)
+
+
+def rebuild_scores(db, exam_id=None):
+    """Recompute aggregates from proctor_violations and the rolled-up
+    proctor_violation_summaries. Returns sessions rebuilt.
+
+    Meant for backfills with proctoring idle; a flush landing mid-rebuild
+    would be counted twice.
+    """
+    sessions = db.query(ProctorSession.id)
+    grouped = db.query(
+        ProctorViolation.session_id, ProctorViolation.violation_type, func.count()
+    )
+    summarized = db.query(
+        ProctorViolationSummary.session_id, ProctorViolationSummary.violation_type,
+        ProctorViolationSummary.count,
+    )
+    stale = db.query(ProctorSessionScore)
+    if exam_id is not None:
+        sessions = sessions.filter(ProctorSession.exam_id == exam_id)
+        in_exam = select(ProctorSession.id).where(ProctorSession.exam_id == exam_id)
+        grouped = grouped.filter(ProctorViolation.session_id.in_(in_exam))
+        summarized = summarized.filter(ProctorViolationSummary.session_id.in_(in_exam))
+        stale = stale.filter(ProctorSessionScore.session_id.in_(in_exam))
+
+    counts = {sid: Counter() for (sid,) in sessions}
+    for session_id, violation_type, n in grouped.group_by(
+        ProctorViolation.session_id, ProctorViolation.violation_type
+    ):
+        if session_id in counts:
+            counts[session_id][violation_type] += n
+    for session_id, violation_type, n in summarized:
+        if session_id in counts:
+            counts[session_id][violation_type] += n
+
+    stale.delete(synchronize_session=False)
+    db.add_all(
+        ProctorSessionScore(
+            session_id=session_id,
+            penalty_total=sum(penalty(t) * n for t, n in c.items()),
+            violation_count=sum(c.values()),
+            type_counts=json.dumps(c),
+        )
+        for session_id, c in counts.items()
+    )
+    db.commit()
+    return len(counts)
+
+
+def main():
+    from app.database import SessionLocal, upgrade_schema
+
+    parser = argparse.ArgumentParser(description="Rebuild materialized proctoring scores")
+    parser.add_argument("--exam", type=int, help="only this exam's sessions")
+    args = parser.parse_args()
+
+    upgrade_schema()
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt scores for {rebuild_scores(db, args.exam)} sessions")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from app.models_proctor import ProctorSession
+
+# ===================== CONFIG =====================
+# Sessions whose owner is kept in memory; 0 reads the database every time
+OWNER_CACHE_MAX = int(os.getenv("PROCTOR_OWNER_CACHE_MAX", "20000"))
+# Seconds an entry lives without being looked up
+OWNER_CACHE_TTL = float(os.getenv("PROCTOR_OWNER_CACHE_TTL", "1800"))
+
+SessionOwner = namedtuple("SessionOwner", "user_id exam_id started_at")
+
+
+# ===================== CACHE =====================
+class SessionOwnerCache:
+    """session_id -> SessionOwner, so per-frame ownership checks skip the database.
+
+    Filled by /proctor/start, or from the database on a miss (the first
+    lookup after a restart, an eviction or on another worker). A session's
+    owner and exam never change, so entries cannot go stale; /proctor/end
+    drops them to free the slot, and idle ones expire after `ttl`.
+    """
+
+    def __init__(self, max_entries=OWNER_CACHE_MAX, ttl=OWNER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._entries = OrderedDict()
+        # /frame runs on the event loop, /end and /events in the threadpool
+        self._lock = threading.Lock()
+
+    def get(self, session_id, now=None):
+        """Cached owner, or None; never touches the database."""
+        now = time.time() if now is None else now
+        with self._lock:
+            cached = self._entries.get(session_id)
+            if cached is not None and now - cached[1] >= self.ttl:
+                del self._entries[session_id]
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self._entries[session_id] = (cached[0], now)
+            self.hits += 1
+            return cached[0]
+
+    def put(self, session_id, owner, now=None):
+        if self.max_entries <= 0:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[session_id] = (owner, now)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def lookup(self, db, session_id):
+        """Owner of the session, reading the database only on a miss; None if unknown."""
+        owner = self.get(session_id)
+        if owner is not None:
+            return owner
+        row = db.query(
+            ProctorSession.user_id, ProctorSession.exam_id, ProctorSession.started_at
+        ).filter(ProctorSession.id == session_id).first()
+        if row is None:
+            return None
+        owner = SessionOwner(row.user_id, row.exam_id, row.started_at)
+        self.put(session_id, owner)
+        return owner
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evicted": self.evicted,
+        }
+
+
+session_owners = SessionOwnerCache()
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+
+# ===================== CONFIG =====================
+SESSION_STORE_MAX = int(os.getenv("PROCTOR_MAX_SESSIONS", "10000"))
+# Seconds without a frame before a session's state is dropped
+SESSION_STORE_TTL = float(os.getenv("PROCTOR_SESSION_TTL", "1800"))
+
+
+def new_proctor_state():
+    return {
+        "no_face_since": None,
+        "multi_face_count": 0,
+        "dark_frame_count": 0,
+        "low_motion_streak": 0,
+        "blur_streak": 0,
+        "total_violations": 0,
+        "last_violation_at": None,
+        "clean_frames": 0,
+    }
+
+
+def _new_entry(now):
+    return {
+        "state": new_proctor_state(),
+        "last_frame_time": 0,
+        "touched": now,
+    }
+
+
+# ===================== STORE =====================
+class SessionStore:
+    """Per-session proctoring state with a size cap, idle TTL and LRU eviction.
+
+    Motion history is kept outside, in app.services.motion_arena.
+
+    get() always returns an entry: a session that was evicted mid-exam
+    simply restarts from fresh counters.
+    """
+
+    def __init__(self, max_sessions=SESSION_STORE_MAX, ttl=SESSION_STORE_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+        self.ended = 0
+        self._entries = OrderedDict()
+        self._listeners = []
+
+    def on_evict(self, callback):
+        """Register callback(session_id), called whenever a session is dropped."""
+        self._listeners.append(callback)
+
+    def get(self, session_id, now=None):
+        now = time.time() if now is None else now
+        self._expire(now)
+
+        entry = self._entries.get(session_id)
+        if entry is None:
+            while len(self._entries) >= self.max_sessions:
+                self._drop(next(iter(self._entries)))
+                self.evicted_lru += 1
+            entry = self._entries[session_id] = _new_entry(now)
+        else:
+            self._entries.move_to_end(session_id)
+            entry["touched"] = now
+        return entry
+
+    def end(self, session_id):
+        """End-of-session hook: free everything held for the session."""
+        if session_id in self._entries:
+            self._drop(session_id)
+            self.ended += 1
+
+    def _expire(self, now):
+        # Entries are kept in access order, so expired ones sit at the front
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if now - entry["touched"] < self.ttl:
+                break
+            self._drop(session_id)
+            self.evicted_ttl += 1
+
+    def _drop(self, session_id):
+        self._entries.pop(session_id, None)
+        for callback in self._listeners:
+            callback(session_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def memory_bytes(self):
+        total = sys.getsizeof(self._entries)
+        for entry in self._entries.values():
+            total += sys.getsizeof(entry) + sys.getsizeof(entry["state"])
+        return total
+
+    def stats(self):
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "memory_bytes": self.memory_bytes(),
+            "evicted_lru": self.evicted_lru,
+            "evicted_ttl": self.evicted_ttl,
+            "ended": self.ended,
+        }
+
+
+sessions = SessionStore()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.services.session_store import (
+    sessions, new_proctor_state, SESSION_STORE_MAX, SESSION_STORE_TTL,
+)
+
+# ===================== CONFIG =====================
+# "memory" keeps counters in this process (single uvicorn worker only);
+# "sqlite" shares them between every worker on the machine
+STATE_BACKEND = os.getenv("PROCTOR_STATE_BACKEND", "memory")
+STATE_DB_PATH = os.getenv("PROCTOR_STATE_DB", "./proctor_state.db")
+
+
+# ===================== INTERFACE =====================
+class StateBackend:
+    """Where per-session proctor entries live.
+
+    An entry is {"state": {...streak counters...}, "last_frame_time": float}.
+    update() must run fn on the entry as one atomic read-modify-write, even
+    when several worker processes update the same session concurrently; a
+    Redis implementation would do the same with WATCH/MULTI or a Lua script.
+    Per-process resources (face tracker, motion arena) stay in the local
+    SessionStore, which every backend touches so their evictions still run.
+
+    A backend that does file or network I/O per call sets `blocking`; the
+    async helpers then run it on a worker thread so a busy lock held by
+    another worker never stalls the event loop.
+    """
+
+    blocking = False
+
+    def __init__(self, local=sessions):
+        self.local = local
+
+    async def update_async(self, session_id, fn, now=None):
+        if not self.blocking:
+            return self.update(session_id, fn, now)
+        return await asyncio.to_thread(self.update, session_id, fn, now)
+
+    async def end_async(self, session_id):
+        if not self.blocking:
+            return self.end(session_id)
+        return await asyncio.to_thread(self.end, session_id)
+
+    def update(self, session_id, fn, now=None):
+        raise NotImplementedError
+
+    def end(self, session_id):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+# ===================== IN-PROCESS =====================
+class MemoryStateBackend(StateBackend):
+    def __init__(self, local=sessions):
+        super().__init__(local)
+        # Sync routes (e.g. /proctor/events) call in from the threadpool
+        # while the frame path calls from the event loop
+        self._lock = threading.Lock()
+
+    def update(self, session_id, fn, now=None):
+        with self._lock:
+            return fn(self.local.get(session_id, now))
+
+    def end(self, session_id):
+        with self._lock:
+            self.local.end(session_id)
+
+    def stats(self):
+        return {"backend": "memory", **self.local.stats()}
+
+
+# ===================== SQLITE (WAL) =====================
+class SQLiteStateBackend(StateBackend):
+    """Entries as JSON rows in a WAL-mode SQLite file shared by all workers.
+
+    BEGIN IMMEDIATE takes the write lock before the read, which makes each
+    update() atomic across processes. Size cap and idle TTL are enforced
+    every few hundred updates by deleting the least recently touched rows.
+    """
+
+    SWEEP_EVERY = 256
+    blocking = True
+
+    def __init__(self, path=STATE_DB_PATH, max_sessions=SESSION_STORE_MAX,
+                 ttl=SESSION_STORE_TTL, local=sessions):
+        super().__init__(local)
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.updates = 0
+        self.evicted = 0
+        self._local_conn = threading.local()
+        # update() and end() run on worker threads; the local store is not
+        # thread-safe on its own
+        self._local_lock = threading.Lock()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS proctor_state ("
+            " session_id INTEGER PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " touched REAL NOT NULL)"
+        )
+        self._connect().execute(
+            "CREATE INDEX IF NOT EXISTS ix_proctor_state_touched ON proctor_state (touched)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local_conn, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL only fsyncs at checkpoints; losing the last few
+            # streak updates on power loss is acceptable for counters
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local_conn.conn = conn
+        return conn
+
+    def update(self, session_id, fn, now=None):
+        now = time.time() if now is None else now
+        with self._local_lock:
+            self.local.get(session_id, now)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM proctor_state WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or now - json.loads(row[0]).get("touched", now) >= self.ttl:
+                entry = {"state": new_proctor_state(), "last_frame_time": 0}
+            else:
+                entry = json.loads(row[0])
+
+            result = fn(entry)
+
+            entry["touched"] = now
+            conn.execute(
+                "INSERT OR REPLACE INTO proctor_state (session_id, data, touched) VALUES (?, ?, ?)",
+                (session_id, json.dumps(entry), now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self.updates += 1
+        if self.updates % self.SWEEP_EVERY == 0:
+            self._sweep(now)
+        return result
+
+    def _sweep(self, now):
+        conn = self._connect()
+        expired = conn.execute(
+            "DELETE FROM proctor_state WHERE touched < ?", (now - self.ttl,)
+        ).rowcount
+        overflow = conn.execute(
+            "DELETE FROM proctor_state WHERE session_id IN ("
+            " SELECT session_id FROM proctor_state ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        ).rowcount
+        self.evicted += expired + overflow
+
+    def end(self, session_id):
+        self._connect().execute("DELETE FROM proctor_state WHERE session_id = ?", (session_id,))
+        with self._local_lock:
+            self.local.end(session_id)
+
+    def stats(self):
+        sessions_count = self._connect().execute("SELECT COUNT(*) FROM proctor_state").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": sessions_count,
+            "evicted": self.evicted,
+            "local": self.local.stats(),
+        }
+
+
+def create_state_backend(kind=STATE_BACKEND):
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend()
+    raise ValueError(f"Unknown PROCTOR_STATE_BACKEND: {kind}")
+
+
+state_backend = create_state_backend()
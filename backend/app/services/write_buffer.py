@@ -0,0 +1,248 @@
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from app.database import SessionLocal
+from app.models_proctor import ProctorEvent, ProctorFrameTrace, ProctorViolation
+from app.services.scoring import record_violations
+
+# ===================== CONFIG =====================
+# Rows queued before a flush is triggered early
+WRITE_BUFFER_ROWS = int(os.getenv("PROCTOR_WRITE_BUFFER_ROWS", "200"))
+# Longest a row waits in memory; 0 writes every row through immediately
+WRITE_BUFFER_MS = int(os.getenv("PROCTOR_WRITE_BUFFER_MS", "500"))
+# Rows kept while the database is failing; beyond this the oldest are
+# dropped (frame traces, then events, then violations) and counted
+WRITE_BUFFER_MAX = int(os.getenv("PROCTOR_WRITE_BUFFER_MAX", "10000"))
+
+
+# ===================== BUFFER =====================
+class WriteBuffer:
+    """Violations, browser events and frame trace chunks queued in memory
+    and inserted in bulk.
+
+    A background thread flushes every `interval` seconds, or as soon as
+    `max_rows` are queued, in one transaction per flush. A crash therefore
+    loses at most `max_rows` rows or `interval` seconds of them. stop()
+    flushes whatever is left at shutdown.
+
+    Reads that combine the database with pending_violations() run inside
+    consistent_read(), which waits out an in-progress flush so each row is
+    counted exactly once.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_rows=WRITE_BUFFER_ROWS,
+                 interval_ms=WRITE_BUFFER_MS, max_pending=WRITE_BUFFER_MAX):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.interval = interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+        self.dropped = 0
+        self.rejected = 0
+        self._violations = []
+        self._events = []
+        self._traces = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    # ---------- producers ----------
+    def add_violation(self, session_id, violation_type, timestamp=None, evidence_key=None):
+        self._add(self._violations, {
+            "session_id": session_id,
+            "violation_type": violation_type,
+            "timestamp": timestamp or datetime.utcnow(),
+            "evidence_key": evidence_key,
+        })
+
+    def add_event(self, user_id, session_id, event_type, payload=None, timestamp=None, seq=None):
+        self._add(self._events, {
+            "user_id": user_id,
+            "session_id": session_id,
+            "event_type": event_type,
+            "payload": payload,
+            "seq": seq,
+            "timestamp": timestamp or datetime.utcnow(),
+        })
+
+    def add_trace(self, session_id, started_at, frames, data):
+        self._add(self._traces, {
+            "session_id": session_id,
+            "started_at": started_at,
+            "frames": frames,
+            "data": data,
+        })
+
+    def _pending(self):
+        # Caller holds _lock
+        return len(self._violations) + len(self._events) + len(self._traces)
+
+    def _add(self, rows, row):
+        with self._lock:
+            rows.append(row)
+            queued = self._pending()
+            self._trim()
+
+        if self.interval <= 0 or self._stopping:
+            self.flush()
+            return
+        self._ensure_thread()
+        if queued >= self.max_rows:
+            self._wake.set()
+
+    def _trim(self):
+        # Caller holds _lock
+        excess = self._pending() - self.max_pending
+        if excess <= 0:
+            return
+        self.dropped += excess
+        for rows in (self._traces, self._events, self._violations):
+            dropped = min(excess, len(rows))
+            del rows[:dropped]
+            excess -= dropped
+
+    # ---------- reads ----------
+    @contextmanager
+    def consistent_read(self):
+        with self._flush_lock:
+            yield
+
+    def pending_violations(self, session_ids):
+        """(session_id, violation_type) of queued violations for these sessions."""
+        session_ids = set(session_ids)
+        with self._lock:
+            return [
+                (row["session_id"], row["violation_type"])
+                for row in self._violations
+                if row["session_id"] in session_ids
+            ]
+
+    def pending_event_seq(self, session_id):
+        """Highest client sequence number queued for the session, or 0."""
+        with self._lock:
+            return max(
+                (row["seq"] for row in self._events
+                 if row["session_id"] == session_id and row["seq"] is not None),
+                default=0,
+            )
+
+    # ---------- flushing ----------
+    def flush(self):
+        """Insert everything queued in one transaction. Returns rows written.
+
+        If the bulk insert fails the rows are retried one by one, so a
+        single bad row costs only itself: rows the database still refuses
+        are dropped and counted as rejected. Only when the database itself
+        is unreachable are the remaining rows queued again.
+        """
+        with self._flush_lock:
+            with self._lock:
+                violations, self._violations = self._violations, []
+                events, self._events = self._events, []
+                traces, self._traces = self._traces, []
+            if not violations and not events and not traces:
+                return 0
+
+            db = self.session_factory()
+            try:
+                if violations:
+                    db.execute(insert(ProctorViolation), violations)
+                    record_violations(db, violations)
+                if events:
+                    db.execute(insert(ProctorEvent), events)
+                if traces:
+                    db.execute(insert(ProctorFrameTrace), traces)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    self.failures += 1
+                print("PROCTOR WRITE BUFFER FLUSH FAILED:", e)
+                written = self._flush_rows(db, violations, events, traces)
+            else:
+                written = len(violations) + len(events) + len(traces)
+            finally:
+                db.close()
+
+            self.flushes += 1
+            self.flushed_rows += written
+            return written
+
+    def _flush_rows(self, db, violations, events, traces):
+        """Row-by-row retry after a failed bulk insert. Returns rows written."""
+        written = 0
+        pending = [(ProctorViolation, violations), (ProctorEvent, events), (ProctorFrameTrace, traces)]
+        for kind, (model, rows) in enumerate(pending):
+            for i, row in enumerate(rows):
+                try:
+                    db.execute(insert(model), [row])
+                    if model is ProctorViolation:
+                        record_violations(db, [row])
+                    db.commit()
+                    written += 1
+                except OperationalError as e:
+                    # The database is down, not the row: keep what is left
+                    # in front of anything queued meanwhile
+                    db.rollback()
+                    left = [[]] * kind + [rows[i:]] + [r for _, r in pending[kind + 1:]]
+                    with self._lock:
+                        self._violations[:0] = left[0]
+                        self._events[:0] = left[1]
+                        self._traces[:0] = left[2]
+                        self._trim()
+                    print("PROCTOR WRITE BUFFER FLUSH FAILED:", e)
+                    return written
+                except Exception as e:
+                    db.rollback()
+                    with self._lock:
+                        self.rejected += 1
+                    print("PROCTOR WRITE BUFFER ROW REJECTED:", e)
+        return written
+
+    def _ensure_thread(self):
+        if self._thread is not None or self._stopping:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="proctor-write-buffer", daemon=True
+                )
+                self._thread.start()
+
+    def _loop(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending()
+        return {
+            "pending": pending,
+            "flushes": self.flushes,
+            "avg_batch": self.flushed_rows / self.flushes if self.flushes else 0.0,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+
+write_buffer = WriteBuffer()
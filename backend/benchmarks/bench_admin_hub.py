@@ -0,0 +1,96 @@
+"""Admin fan-out delivery latency with hundreds of simulated sockets, some
+deliberately slow: the old sequential broadcast versus the queued hub.
+
+Run from backend/:  python -m benchmarks.bench_admin_hub
+"""
+import asyncio
+import time
+
+from app.services.admin_hub import ConnectionManager
+from app.services.event_bus import LocalEventBus
+
+SOCKETS = 500
+SLOW_EVERY = 10          # every 10th socket is slow
+SLOW_SEND_S = 0.02       # per message, for a slow socket
+MESSAGES = 200
+PUBLISH_GAP_S = 0.002
+EXAMS = 5
+
+
+class FakeSocket:
+    def __init__(self, slow):
+        self.slow = slow
+        self.latencies = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.slow:
+            await asyncio.sleep(SLOW_SEND_S)
+        self.latencies.append(time.perf_counter() - message["sent_at"])
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+def _percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else float("nan")
+
+
+def _report(name, sockets, elapsed):
+    fast = [l for s in sockets if not s.slow for l in s.latencies]
+    slow = [l for s in sockets if s.slow for l in s.latencies]
+    print(f"{name:>10}  fast p50 {_percentile(fast, 0.5) * 1000:7.2f} ms"
+          f"  p99 {_percentile(fast, 0.99) * 1000:7.2f} ms"
+          f"  | slow delivered {len(slow):>5}  | publish loop {elapsed * 1000:7.1f} ms")
+
+
+async def sequential():
+    # The old ConnectionManager.broadcast: await every socket in turn
+    sockets = [FakeSocket(i % SLOW_EVERY == 0) for i in range(SOCKETS)]
+    # Fewer messages: every one waits for all the slow sockets
+    messages = MESSAGES // 40
+    t0 = time.perf_counter()
+    for i in range(messages):
+        message = {"type": "violation", "exam_id": i % EXAMS, "sent_at": time.perf_counter()}
+        for socket in sockets:
+            await socket.send_json(message)
+        await asyncio.sleep(PUBLISH_GAP_S)
+    _report("sequential", sockets, time.perf_counter() - t0)
+
+
+async def hub(subscribed):
+    manager = ConnectionManager(bus=LocalEventBus(tick_ms=5), queue_size=64, slow_seconds=0.3)
+    manager.start()
+    sockets = [FakeSocket(i % SLOW_EVERY == 0) for i in range(SOCKETS)]
+    for i, socket in enumerate(sockets):
+        exam_ids = {i % EXAMS} if subscribed else None
+        await manager.connect(socket, exam_ids)
+
+    t0 = time.perf_counter()
+    for i in range(MESSAGES):
+        manager.publish({"type": "violation", "exam_id": i % EXAMS, "sent_at": time.perf_counter()})
+        await asyncio.sleep(PUBLISH_GAP_S)
+    elapsed = time.perf_counter() - t0
+    await asyncio.sleep(0.2)
+
+    _report("per-exam" if subscribed else "hub", sockets, elapsed)
+    stats = manager.stats()
+    print(f"{'':>10}  dropped {stats['dropped']}  closed slow {stats['closed_slow']}"
+          f"  connections left {stats['connections']}")
+    for connection in list(manager.active_connections):
+        manager.disconnect(connection)
+    manager.stop()
+
+
+async def main():
+    await sequential()
+    await hub(subscribed=False)
+    await hub(subscribed=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""Per-request vs micro-batched frame analysis throughput.
+
+Run from backend/:  python -m benchmarks.bench_batching
+"""
+import asyncio
+import time
+
+from app.services.frame_analyzer import FrameAnalyzer
+from app.services.frame_batcher import FrameBatcher
+from app.services.motion_arena import arena
+from benchmarks.frames import jpeg_corpus
+
+SESSION_COUNTS = (100, 500, 2000)
+ROUNDS = 3
+
+
+async def _drive(analyze, frames, sessions):
+    start = time.perf_counter()
+    for r in range(ROUNDS):
+        await asyncio.gather(*(
+            analyze(frames[(s + r) % len(frames)], motion_slot=arena.slot(s))
+            for s in range(sessions)
+        ))
+    return sessions * ROUNDS / (time.perf_counter() - start)
+
+
+async def main():
+    frames = jpeg_corpus(64)
+    print(f"{'sessions':>8} {'mode':>10} {'frames/s':>10} {'per core':>10}")
+    for sessions in SESSION_COUNTS:
+        analyzer = FrameAnalyzer(queue_depth=sessions)
+        batcher = FrameBatcher(analyzer)
+        for mode, fn in (("request", analyzer.analyze), ("batched", batcher.analyze)):
+            fps = await _drive(fn, frames, sessions)
+            print(f"{sessions:>8} {mode:>10} {fps:>10.1f} {fps / analyzer.workers:>10.1f}")
+        stats = batcher.stats()
+        print(f"{'':>8} {'':>10} avg batch {stats['avg_batch_size']:.1f}")
+        analyzer.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""Decode+analyze time per frame and detection agreement across ingest tiers.
+
+Run from backend/:  python -m benchmarks.bench_decode_tiers [RECORDED_DIR]
+
+Agreement is measured against the "color" tier on the decisions the rules
+take: face count, dark frame (brightness < 10) and blurry frame (blur < 15).
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.frame_analyzer import DECODE_MODES, analyze_jpeg
+from benchmarks.frames import encode, jpeg_corpus, load_recorded, make_frame
+
+
+def _corpus(root):
+    if root:
+        return [f for frames in load_recorded(root).values() for f in frames]
+    frames = jpeg_corpus(60, 640, 480) + jpeg_corpus(60)
+    # Covered cameras, so the dark-frame decision is exercised too
+    frames += [encode((make_frame(i) * 0.03).astype(np.uint8)) for i in range(20)]
+    return frames
+
+
+def main(root=None):
+    frames = _corpus(root)
+    reference = [analyze_jpeg(f, decode_mode="color") for f in frames]
+
+    print(f"{'tier':>13} {'ms/frame':>9} {'faces':>7} {'dark':>7} {'blur':>7}")
+    for mode in DECODE_MODES:
+        start = time.perf_counter()
+        results = [analyze_jpeg(f, decode_mode=mode) for f in frames]
+        per_frame = 1000 * (time.perf_counter() - start) / len(frames)
+
+        pairs = [(r, ref) for r, ref in zip(results, reference) if r and ref]
+        agree = lambda fn: sum(fn(r) == fn(ref) for r, ref in pairs) / len(pairs)
+        print(f"{mode:>13} {per_frame:>9.2f} "
+              f"{agree(lambda m: m['faces']):>7.1%} "
+              f"{agree(lambda m: m['brightness'] < 10):>7.1%} "
+              f"{agree(lambda m: m['blur'] < 15):>7.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,75 @@
+"""Cross-process delivery through the SQLite event bus: several publisher
+processes (stand-ins for uvicorn workers) and one subscriber, checking that
+every event arrives and reporting publish-to-deliver latency.
+
+Run from backend/:  python -m benchmarks.bench_event_bus
+"""
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from app.services.event_bus import SQLiteEventBus
+
+WORKERS = 4
+EVENTS_PER_WORKER = 500
+PUBLISH_GAP_S = 0.002
+TICK_MS = 20
+
+
+def _publisher(path, worker):
+    async def run():
+        bus = SQLiteEventBus(path=path, tick_ms=TICK_MS)
+        bus.start(lambda events: None)
+        for i in range(EVENTS_PER_WORKER):
+            bus.publish({"type": "violation", "exam_id": worker, "seq": i})
+            await asyncio.sleep(PUBLISH_GAP_S)
+        await asyncio.sleep(TICK_MS / 1000.0 * 2)
+        bus.stop()
+
+    asyncio.run(run())
+
+
+async def _subscribe(path, expected, ready):
+    bus = SQLiteEventBus(path=path, tick_ms=TICK_MS)
+    received = []
+    bus.start(received.extend)
+    ready.set()
+    deadline = time.time() + 30
+    while len(received) < expected and time.time() < deadline:
+        await asyncio.sleep(0.05)
+    bus.stop()
+    return received, bus.stats()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        SQLiteEventBus(path=path)  # create the log before anyone reads it
+        expected = WORKERS * EVENTS_PER_WORKER
+
+        ready = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=_publisher, args=(path, w)) for w in range(WORKERS)]
+
+        async def run():
+            subscriber = asyncio.ensure_future(_subscribe(path, expected, ready))
+            await asyncio.sleep(0.1)
+            for p in procs:
+                p.start()
+            return await subscriber
+
+        received, stats = asyncio.run(run())
+        for p in procs:
+            p.join()
+
+    per_worker = [sorted(e["seq"] for e in received if e["exam_id"] == w) for w in range(WORKERS)]
+    complete = all(seqs == list(range(EVENTS_PER_WORKER)) for seqs in per_worker)
+    print(f"{WORKERS} publishers x {EVENTS_PER_WORKER} events -> received {len(received)}/{expected}"
+          f" ({'complete' if complete else 'MISSING EVENTS'})")
+    print(f"latency p50 {stats['latency_p50_ms']:.1f} ms  p99 {stats['latency_p99_ms']:.1f} ms"
+          f"  avg batch {stats['avg_batch']:.1f}  (tick {TICK_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
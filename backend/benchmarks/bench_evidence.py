@@ -0,0 +1,64 @@
+"""Evidence store costs: what a violating frame adds to the request path
+(capture) versus thumbnailing and writing inline, zero-copy reads, and
+compaction after most violations are gone.
+
+Run from backend/:  python -m benchmarks.bench_evidence
+"""
+import os
+import tempfile
+import time
+
+from app.services.evidence_store import EvidenceStore, evidence_key, thumbnail
+from benchmarks.frames import encode, make_scene
+
+FRAMES = 2000
+READS = 20000
+
+
+def _us(seconds, n):
+    return seconds / n * 1e6
+
+
+def main():
+    frames = [encode(make_scene("multi", seed, 640, 480), 80) for seed in range(FRAMES)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        for data in frames[:200]:
+            thumbnail(data)
+        inline = _us(time.perf_counter() - t0, 200)
+
+        store = EvidenceStore(root=tmp, segment_mb=4, queue_size=FRAMES)
+        t0 = time.perf_counter()
+        keys = [store.capture(data) for data in frames]
+        capture = _us(time.perf_counter() - t0, FRAMES)
+        t0 = time.perf_counter()
+        store.stop()
+        drain = time.perf_counter() - t0
+        stats = store.stats()
+        size = sum(os.path.getsize(os.path.join(tmp, n)) for n in os.listdir(tmp))
+        print(f"request path: capture {capture:7.1f} us/frame   inline thumbnail+write would be {inline:7.1f} us")
+        print(f"writer: {stats['stored']} thumbnails, {stats['segments']} segments,"
+              f" {size / stats['stored'] / 1024:.1f} KiB each (source {sum(map(len, frames)) / FRAMES / 1024:.1f} KiB)"
+              f", drained in {drain:.2f} s after the last capture")
+
+        # A fresh process rebuilding the index from the segment headers
+        t0 = time.perf_counter()
+        reader = EvidenceStore(root=tmp)
+        reader.read(keys[0])
+        print(f"index rebuild: {(time.perf_counter() - t0) * 1000:.1f} ms for {len(reader._index)} records")
+        t0 = time.perf_counter()
+        total = 0
+        for i in range(READS):
+            total += len(reader.read(keys[i % FRAMES]))
+        print(f"read: {_us(time.perf_counter() - t0, READS):.2f} us/thumbnail (memoryview slices, {total >> 20} MiB)")
+
+        # Keep one violation in ten
+        live = {evidence_key(data) for data in frames[::10]}
+        t0 = time.perf_counter()
+        result = reader.compact(live)
+        print(f"compact: {(time.perf_counter() - t0) * 1000:.1f} ms  {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Duplicate-candidate lookup cost as an exam's face index grows.
+
+Compares the blocked matrix query with a per-row Python loop (the naive
+scan) at several index sizes, and checks that a planted duplicate is found.
+
+Run from backend/:  python -m benchmarks.bench_face_index
+"""
+import time
+
+import numpy as np
+
+from app.services.face_index import DUPLICATE_THRESHOLD, EMBEDDING_DIM, ExamFaceIndex
+
+SIZES = (1000, 5000, 10000, 20000)
+QUERIES = 200
+
+
+def _embeddings(rng, n):
+    # face_recognition embeddings are roughly unit length; random directions
+    # sit far apart, like distinct people
+    vectors = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _loop_query(vectors, users, q, user_id):
+    best = None
+    for row, vector in enumerate(vectors):
+        if users[row] == user_id:
+            continue
+        d = float(np.linalg.norm(vector - q))
+        if best is None or d < best[1]:
+            best = (row, d)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(0)
+    vectors = _embeddings(rng, max(SIZES))
+    index = ExamFaceIndex()
+
+    t0 = time.perf_counter()
+    for i in range(max(SIZES)):
+        index.add(i + 1, i + 1, vectors[i])
+    insert_us = (time.perf_counter() - t0) / max(SIZES) * 1e6
+    print(f"insert  {insert_us:6.2f} us/entry")
+
+    users = np.arange(1, max(SIZES) + 1)
+    for n in SIZES:
+        sub = ExamFaceIndex()
+        for i in range(n):
+            sub.add(i + 1, i + 1, vectors[i])
+        queries = _embeddings(rng, QUERIES)
+
+        t0 = time.perf_counter()
+        for q in queries:
+            sub.query(q, user_id=0)
+        indexed_ms = (time.perf_counter() - t0) / QUERIES * 1000
+
+        loops = max(1, QUERIES // 20)
+        t0 = time.perf_counter()
+        for q in queries[:loops]:
+            _loop_query(vectors[:n], users[:n], q, 0)
+        loop_ms = (time.perf_counter() - t0) / loops * 1000
+
+        print(f"n={n:>6}  indexed {indexed_ms:7.3f} ms  loop {loop_ms:8.2f} ms"
+              f"  speedup {loop_ms / indexed_ms:6.1f}x")
+
+    # A second account presenting a slightly perturbed copy of entry 42
+    planted = vectors[41] + rng.standard_normal(EMBEDDING_DIM).astype(np.float32) * 0.01
+    match = index.query(planted, user_id=-1)
+    own = index.query(vectors[41], user_id=42)
+    print(f"planted duplicate -> {match}  (threshold {DUPLICATE_THRESHOLD})")
+    print(f"same user excluded -> {'ok' if own is None or own[1] != 42 else 'WRONG'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Motion history memory per 1000 sessions and score agreement, before/after the arena.
+
+Run from backend/:  python -m benchmarks.bench_motion_arena
+"""
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from app.services.motion_arena import MotionArena
+from benchmarks.frames import make_frame
+
+SESSIONS = 1000
+RESOLUTIONS = ((320, 240), (640, 480))
+
+
+def _gray(seed, width, height, shift=0):
+    img = make_frame(seed, width, height)
+    if shift:
+        img = np.roll(img, shift, axis=1)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def memory(width, height):
+    frame = _gray(0, width, height)
+
+    tracemalloc.start()
+    previous_frames = {s: frame.copy() for s in range(SESSIONS)}
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del previous_frames
+
+    tracemalloc.start()
+    arena = MotionArena(slots=SESSIONS)
+    for s in range(SESSIONS):
+        arena.update(arena.slot(s), frame)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return before, after
+
+
+def agreement(width, height):
+    """Full-frame absdiff vs arena thumbnails on still, jittery and moving frames."""
+    arena = MotionArena(slots=1)
+    slot = arena.slot("s")
+    rows = []
+    for label, shift in (("still", 0), ("jitter", 1), ("moving", 12)):
+        # Same scene, fresh sensor noise each frame, shifted by `shift` px
+        prev = _gray(1, width, height)
+        cur = _gray(2, width, height, shift)
+        arena.valid[slot] = False
+        arena.update(slot, prev)
+        full = float(cv2.absdiff(prev, cur).mean())
+        rows.append((label, full, arena.update(slot, cur)))
+    return rows
+
+
+def main():
+    for width, height in RESOLUTIONS:
+        before, after = memory(width, height)
+        print(f"{width}x{height}: per {SESSIONS} sessions "
+              f"dict of frames {before / 1e6:.1f} MB, arena {after / 1e6:.1f} MB")
+        for label, full, thumb in agreement(width, height):
+            print(f"  {label:>7} motion full {full:6.2f}  arena {thumb:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
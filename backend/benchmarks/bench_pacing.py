@@ -0,0 +1,81 @@
+"""Simulated exam start: 2000 clients at once, fixed 5 s vs server-paced intervals.
+
+Run from backend/:  python -m benchmarks.bench_pacing
+
+Discrete-event simulation of the analyzer queue using the real pacer; the
+service time per frame is a parameter (measure it with bench_batching).
+"""
+import heapq
+import random
+
+from app.services.frame_pacer import next_interval_ms
+
+CLIENTS = 2000
+RISKY_SHARE = 0.05
+WORKERS = 8
+SERVICE_S = 0.03
+QUEUE_DEPTH = WORKERS * 4 * 8
+DURATION_S = 300
+
+
+def simulate(paced, seed=1):
+    rng = random.Random(seed)
+    risky = set(rng.sample(range(CLIENTS), int(CLIENTS * RISKY_SHARE)))
+    events = [(rng.uniform(0, 1.0), c) for c in range(CLIENTS)]  # all start within 1 s
+    heapq.heapify(events)
+
+    busy_until = [0.0] * WORKERS
+    inflight = []  # completion times of queued/running frames
+    latencies, risky_gaps, rejected = [], [], 0
+    last_sent = {}
+
+    while events:
+        now, client = heapq.heappop(events)
+        if now > DURATION_S:
+            break
+        if client in risky and client in last_sent:
+            risky_gaps.append(now - last_sent[client])
+        last_sent[client] = now
+
+        while inflight and inflight[0] <= now:
+            heapq.heappop(inflight)
+        pending = len(inflight)
+        load = pending / QUEUE_DEPTH
+        risk = "high" if client in risky else "low"
+
+        if pending >= QUEUE_DEPTH:
+            rejected += 1
+            done = now
+            load = 1.0
+        else:
+            w = min(range(WORKERS), key=busy_until.__getitem__)
+            start = max(now, busy_until[w])
+            done = busy_until[w] = start + SERVICE_S
+            heapq.heappush(inflight, done)
+            latencies.append(done - now)
+
+        interval = next_interval_ms(risk, load) / 1000 if paced else 5.0
+        heapq.heappush(events, (done + interval if paced else now + interval, client))
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return {
+        "analyzed": len(latencies),
+        "rejected": rejected,
+        "p50_ms": pct(0.5),
+        "p99_ms": pct(0.99),
+        "risky_gap_s": sum(risky_gaps) / max(1, len(risky_gaps)),
+    }
+
+
+def main():
+    print(f"{CLIENTS} clients, {WORKERS} workers x {SERVICE_S * 1000:.0f} ms/frame, {DURATION_S} s")
+    for name, paced in (("fixed 5s", False), ("paced", True)):
+        r = simulate(paced)
+        print(f"{name:>9}: analyzed {r['analyzed']:>7} rejected {r['rejected']:>7} "
+              f"p50 {r['p50_ms']:8.1f} ms p99 {r['p99_ms']:8.1f} ms "
+              f"risky interval {r['risky_gap_s']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Threshold sweep over synthetic frame traces: the vectorized replay versus
+stepping apply_frame_rules frame by frame, with a check that both agree.
+
+Run from backend/:  python -m benchmarks.bench_replay
+"""
+import itertools
+import random
+import time
+
+import numpy as np
+
+from app.services.frame_rules import FRAME_RULES, apply_frame_rules
+from app.services.frame_traces import TRACE_DTYPE
+from app.services.replay import RULE_TYPES, Replay
+from app.services.session_store import new_proctor_state
+
+SESSIONS = 2000
+FRAMES = 1800            # an hour at one analyzed frame every 2 s
+CHECK_SESSIONS = 100
+CHECK_COMBOS = 5
+GRID = {
+    "dark_frames": [3, 5, 8],
+    "no_face_seconds": [10, 15, 30],
+    "multi_face_frames": [2, 4, 6],
+    "low_motion_frames": [3, 5, 8],
+    "low_blur": [10, 15, 20],
+}
+
+
+def _trace(rng, frames):
+    trace = np.zeros(frames, dtype=TRACE_DTYPE)
+    trace["t"] = 1_700_000_000 + np.cumsum(rng.uniform(1.8, 2.6, frames))
+    trace["faces"] = 1
+    trace["brightness"] = rng.normal(110, 20, frames)
+    trace["motion"] = rng.uniform(0.5, 6, frames)
+    trace["blur"] = rng.uniform(20, 300, frames)
+    # A few episodes of each kind at random places
+    for field, value, length in (
+        ("brightness", 4, (2, 12)),
+        ("faces", 0, (2, 20)),
+        ("faces", 2, (1, 8)),
+        ("motion", 0.2, (2, 10)),
+        ("blur", 8, (2, 10)),
+    ):
+        for _ in range(rng.integers(0, 4)):
+            start = rng.integers(0, frames)
+            trace[field][start:start + rng.integers(*length)] = value
+    # Stages switched off for a stretch
+    start = rng.integers(0, frames)
+    trace["motion"][start:start + 30] = np.nan
+    trace["faces"][rng.integers(0, frames, 10)] = -1
+    return trace
+
+
+def _step(trace, rules):
+    state = new_proctor_state()
+    counts = dict.fromkeys(RULE_TYPES, 0)
+    for frame in trace:
+        metrics = {
+            "faces": None if frame["faces"] < 0 else int(frame["faces"]),
+            "brightness": None if np.isnan(frame["brightness"]) else float(frame["brightness"]),
+            "motion": None if np.isnan(frame["motion"]) else float(frame["motion"]),
+            "blur": None if np.isnan(frame["blur"]) else float(frame["blur"]),
+        }
+        violation = apply_frame_rules(state, metrics, float(frame["t"]), rules)
+        if violation:
+            counts[violation] += 1
+    return [counts[t] for t in RULE_TYPES]
+
+
+def main():
+    rng = np.random.default_rng(7)
+    traces = {
+        sid: _trace(rng, int(rng.integers(FRAMES // 2, FRAMES + 1)))
+        for sid in range(1, SESSIONS + 1)
+    }
+    combos = [
+        {**FRAME_RULES, **dict(zip(GRID, values))}
+        for values in itertools.product(*GRID.values())
+    ]
+
+    # Agreement with the live rules on a sample of sessions and combinations
+    sample = {sid: traces[sid] for sid in range(1, CHECK_SESSIONS + 1)}
+    checker = Replay(sample)
+    checked = [FRAME_RULES] + random.Random(7).sample(combos, CHECK_COMBOS)
+    t0 = time.perf_counter()
+    mismatches = sum(
+        checker.counts(rules)[row].tolist() != _step(trace, rules)
+        for rules in checked
+        for row, trace in enumerate(sample.values())
+    )
+    step_s = (time.perf_counter() - t0) / len(checked) * SESSIONS / CHECK_SESSIONS
+    print(f"check: {CHECK_SESSIONS} sessions x {len(checked)} rule sets, "
+          f"{mismatches} mismatches{'' if mismatches else ' (identical)'}")
+
+    t0 = time.perf_counter()
+    replay = Replay(traces)
+    load_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    baseline, results = replay.sweep(GRID)
+    sweep_s = time.perf_counter() - t0
+
+    print(f"{SESSIONS} sessions, {replay.frames} frames, {len(results)} combinations")
+    print(f"frame by frame   ~{step_s * len(results):8.1f} s  (extrapolated, {step_s:.2f} s per combination)")
+    print(f"vectorized        {sweep_s:8.2f} s  (+{load_s:.2f} s to build the matrices)")
+    fewest = min(results, key=lambda r: r["total_violations"])
+    print(f"baseline {baseline['total_violations']} violations, mean confidence "
+          f"{baseline['mean_confidence']:.1f}; fewest {fewest['total_violations']} "
+          f"({fewest['sessions_changed']} sessions change)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Admin report cost on a 5000-seat exam: the old query-per-session report
+versus one page of the riskiest candidates from the aggregate join.
+
+Run from backend/:  python -m benchmarks.bench_report
+"""
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models_proctor import ProctorSession, ProctorSessionScore, ProctorViolation
+from app.services.scoring import VIOLATION_PENALTY, confidence, penalty, rebuild_scores
+
+SEATS = 5000
+MAX_VIOLATIONS = 40
+PAGE = 50
+
+
+def _seed(db):
+    types = list(VIOLATION_PENALTY)
+    db.execute(insert(ProctorSession), [
+        {"id": sid, "exam_id": 1, "user_id": sid} for sid in range(1, SEATS + 1)
+    ])
+    db.execute(insert(ProctorViolation), [
+        {"session_id": sid, "violation_type": random.choice(types)}
+        for sid in range(1, SEATS + 1)
+        for _ in range(random.randint(0, MAX_VIOLATIONS))
+    ])
+    db.commit()
+    rebuild_scores(db)
+
+
+def n_plus_one(db):
+    report = []
+    for session in db.query(ProctorSession).filter(ProctorSession.exam_id == 1).all():
+        violations = db.query(ProctorViolation).filter(
+            ProctorViolation.session_id == session.id
+        ).all()
+        report.append((confidence(sum(penalty(v.violation_type) for v in violations)), session.id))
+    return sorted(report)[:PAGE]
+
+
+def keyset_page(db, after=None):
+    penalty_total = func.coalesce(ProctorSessionScore.penalty_total, 0)
+    query = db.query(ProctorSession.id, penalty_total).outerjoin(
+        ProctorSessionScore, ProctorSessionScore.session_id == ProctorSession.id
+    ).filter(ProctorSession.exam_id == 1)
+    if after is not None:
+        query = query.filter((penalty_total < after[0]) | (
+            (penalty_total == after[0]) & (ProctorSession.id > after[1])))
+    return query.order_by(penalty_total.desc(), ProctorSession.id).limit(PAGE).all()
+
+
+def main():
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'report.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            _seed(db)
+
+            t0 = time.perf_counter()
+            old = n_plus_one(db)
+            old_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            first = keyset_page(db)
+            page_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            keyset_page(db, after=(first[-1][1], first[-1][0]))
+            next_ms = (time.perf_counter() - t0) * 1000
+
+            same = [score for score, _ in old] == [confidence(p) for _, p in first]
+        finally:
+            db.close()
+            engine.dispose()
+
+    print(f"N+1 full report   {old_ms:8.1f} ms")
+    print(f"first page ({PAGE})   {page_ms:8.1f} ms")
+    print(f"next page         {next_ms:8.1f} ms")
+    print(f"riskiest scores {'match' if same else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Violation retention on a semester of exams: table size and query times
+before and after rolling old sessions up into summaries, and a check that
+rebuilt scores are identical.
+
+Run from backend/:  python -m benchmarks.bench_retention
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models_proctor import (
+    ProctorSession, ProctorSessionScore, ProctorViolation, ProctorViolationSummary,
+)
+from app.services.retention import compact_violations
+from app.services.scoring import VIOLATION_PENALTY, rebuild_scores, summarize
+
+EXAMS = 10
+SEATS = 500
+MAX_VIOLATIONS = 80
+RECENT_EXAMS = 2         # within the retention window
+READS = 500
+
+
+def _seed(db, now):
+    types = list(VIOLATION_PENALTY)
+    sessions, violations = [], []
+    for exam in range(EXAMS):
+        # One exam a fortnight; the last RECENT_EXAMS ran in the past few days
+        age = 200 - exam * 14 if exam < EXAMS - RECENT_EXAMS else EXAMS - exam
+        started = now - timedelta(days=age)
+        for seat in range(SEATS):
+            sid = exam * SEATS + seat + 1
+            sessions.append({"id": sid, "exam_id": exam + 1, "user_id": seat + 1, "started_at": started})
+            for _ in range(random.randint(0, MAX_VIOLATIONS)):
+                violations.append({
+                    "session_id": sid,
+                    "violation_type": random.choice(types),
+                    "timestamp": started + timedelta(seconds=random.randint(0, 7200)),
+                })
+    db.execute(insert(ProctorSession), sessions)
+    db.execute(insert(ProctorViolation), violations)
+    db.commit()
+    rebuild_scores(db)
+
+
+def _scores(db):
+    return {
+        s.session_id: (s.penalty_total, s.violation_count, json.loads(s.type_counts))
+        for s in db.query(ProctorSessionScore)
+    }
+
+
+def _measure(db, engine, path):
+    sample = random.Random(1).sample(range(1, EXAMS * SEATS + 1), READS)
+    recent = [sid for sid in sample if sid > (EXAMS - RECENT_EXAMS) * SEATS]
+    timings = {}
+
+    t0 = time.perf_counter()
+    for sid in sample:
+        summarize(db.query(ProctorSessionScore).filter(ProctorSessionScore.session_id == sid).first())
+    timings["confidence read"] = (time.perf_counter() - t0) / READS * 1000
+
+    t0 = time.perf_counter()
+    for sid in recent:
+        db.query(ProctorViolation.violation_type, func.count()).filter(
+            ProctorViolation.session_id == sid
+        ).group_by(ProctorViolation.violation_type).all()
+    timings["recent session breakdown"] = (time.perf_counter() - t0) / max(1, len(recent)) * 1000
+
+    t0 = time.perf_counter()
+    db.query(func.count(ProctorViolation.id)).scalar()
+    timings["full count"] = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    rebuild_scores(db)
+    timings["rebuild_scores"] = (time.perf_counter() - t0) * 1000
+
+    db.commit()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    rows = db.query(func.count(ProctorViolation.id)).scalar()
+    summaries = db.query(func.count()).select_from(ProctorViolationSummary).scalar()
+    return rows, summaries, os.path.getsize(path), timings
+
+
+def main():
+    random.seed(0)
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "retention.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            _seed(db, now)
+            before_scores = _scores(db)
+            before = _measure(db, engine, path)
+
+            t0 = time.perf_counter()
+            result = compact_violations(db, older_than_days=60, archive_dir=os.path.join(tmp, "archive"), now=now)
+            compact_s = time.perf_counter() - t0
+            archive_bytes = sum(os.path.getsize(p) for p in result["archives"])
+
+            after = _measure(db, engine, path)
+            same = _scores(db) == before_scores
+        finally:
+            db.close()
+            engine.dispose()
+
+    print(f"{EXAMS} exams x {SEATS} seats; compacted {result['rows']} rows of {result['sessions']} sessions"
+          f" in {compact_s:.1f} s into {len(result['archives'])} archives ({archive_bytes / 1024:.0f} KiB)")
+    print(f"{'':>26} {'before':>12} {'after':>12}")
+    print(f"{'violation rows':>26} {before[0]:>12} {after[0]:>12}")
+    print(f"{'summary rows':>26} {before[1]:>12} {after[1]:>12}")
+    print(f"{'database size (KiB)':>26} {before[2] // 1024:>12} {after[2] // 1024:>12}")
+    for name in before[3]:
+        print(f"{name + ' (ms)':>26} {before[3][name]:>12.3f} {after[3][name]:>12.3f}")
+    print(f"rebuilt scores {'identical' if same else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Confidence score read cost for sessions with thousands of violations:
+re-summing every ProctorViolation row versus the materialized aggregate.
+
+Run from backend/:  python -m benchmarks.bench_scoring
+"""
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models_proctor import ProctorSession, ProctorSessionScore, ProctorViolation
+from app.services.scoring import VIOLATION_PENALTY, confidence, penalty, rebuild_scores, summarize
+
+SESSIONS = 50
+VIOLATIONS_PER_SESSION = (100, 1000, 5000)
+READS = 50
+
+
+def _seed(db, per_session):
+    types = list(VIOLATION_PENALTY)
+    db.execute(insert(ProctorSession), [
+        {"id": sid, "exam_id": 1, "user_id": sid} for sid in range(1, SESSIONS + 1)
+    ])
+    db.execute(insert(ProctorViolation), [
+        {"session_id": sid, "violation_type": random.choice(types)}
+        for sid in range(1, SESSIONS + 1)
+        for _ in range(per_session)
+    ])
+    db.commit()
+    rebuild_scores(db)
+
+
+def _scan(db, session_id):
+    violations = db.query(ProctorViolation).filter(
+        ProctorViolation.session_id == session_id
+    ).all()
+    return confidence(sum(penalty(v.violation_type) for v in violations))
+
+
+def _materialized(db, session_id):
+    score = db.query(ProctorSessionScore).filter(
+        ProctorSessionScore.session_id == session_id
+    ).first()
+    return summarize(score)["confidence_score"]
+
+
+def _timed(db, fn):
+    t0 = time.perf_counter()
+    results = [fn(db, random.randint(1, SESSIONS)) for _ in range(READS)]
+    return (time.perf_counter() - t0) / READS * 1000, results
+
+
+def main():
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for per_session in VIOLATIONS_PER_SESSION:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, f'{per_session}.db')}")
+            Base.metadata.create_all(bind=engine)
+            db = sessionmaker(bind=engine)()
+            try:
+                _seed(db, per_session)
+                scan_ms, _ = _timed(db, _scan)
+                mat_ms, _ = _timed(db, _materialized)
+                same = all(_scan(db, sid) == _materialized(db, sid) for sid in range(1, SESSIONS + 1))
+            finally:
+                db.close()
+                engine.dispose()
+            print(f"{per_session:>5} violations/session  scan {scan_ms:8.3f} ms"
+                  f"  materialized {mat_ms:6.3f} ms  speedup {scan_ms / mat_ms:7.1f}x"
+                  f"  {'match' if same else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Database queries per /proctor/frame call with thousands of sessions:
+ownership read from the database on every frame versus the in-process
+session owner cache. Clients send faster than the 2 s analysis window, so
+most frames are skipped.
+
+Run from backend/:  python -m benchmarks.bench_session_owners
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+SESSIONS = 3000
+ROUNDS = 4               # every session sends a frame per round
+
+
+class FakeUpload:
+    def __init__(self, data):
+        self.data = data
+
+    async def read(self):
+        return self.data
+
+
+async def _drive(label, cache_size):
+    from sqlalchemy import event
+
+    from app import models_proctor
+    from app.database import SessionLocal, engine
+    from app.routes import proctor
+    from app.services.session_owners import SessionOwner, session_owners
+    from app.services.state_backend import state_backend
+    from benchmarks.frames import encode, make_scene
+
+    db = SessionLocal()
+    session_ids = []
+    for i in range(SESSIONS):
+        row = models_proctor.ProctorSession(exam_id=1, user_id=i + 1)
+        db.add(row)
+        db.flush()
+        session_ids.append(row.id)
+    db.commit()
+
+    session_owners.max_entries = cache_size
+    session_owners.hits = session_owners.misses = 0
+    for i, sid in enumerate(session_ids):
+        # As /proctor/start does
+        state_backend.end(sid)
+        session_owners.put(sid, SessionOwner(i + 1, 1, None))
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    frame = FakeUpload(encode(make_scene("normal", 0, 160, 120)))
+    by_status = {"skipped": [0, 0], "analyzed": [0, 0]}
+
+    async def one(i, sid):
+        before = queries[0]
+        result = await proctor.analyze_frame(
+            session_id=sid, frame=frame, db=db, user={"user_id": i + 1, "role": "student"}
+        )
+        bucket = by_status["skipped" if result.get("status") == "SKIPPED" else "analyzed"]
+        bucket[0] += 1
+        bucket[1] += queries[0] - before
+
+    t0 = time.perf_counter()
+    for _ in range(ROUNDS):
+        await asyncio.gather(*(one(i, sid) for i, sid in enumerate(session_ids)))
+    elapsed = time.perf_counter() - t0
+    event.remove(engine, "before_cursor_execute", count)
+    db.close()
+
+    frames = SESSIONS * ROUNDS
+    print(f"{label:>10}  {queries[0] / frames:5.2f} queries/frame  "
+          + "  ".join(f"{name} {n:>6} ({q / n if n else 0:4.2f} q/frame)"
+                      for name, (n, q) in by_status.items())
+          + f"  {elapsed:6.1f} s  hit rate {session_owners.stats()['hit_rate']:.2f}")
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="proctor-owners-")
+    # Before any app import: the app reads these at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ.setdefault("PROCTOR_STATE_BACKEND", "memory")
+    os.environ.setdefault("PROCTOR_ANALYZER_QUEUE_DEPTH", str(SESSIONS))
+
+    from app.database import Base, engine
+    from app.services.frame_analyzer import analyzer
+    from app.services.write_buffer import write_buffer
+
+    Base.metadata.create_all(bind=engine)
+    print(f"{SESSIONS} sessions x {ROUNDS} frames each")
+
+    async def run():
+        await _drive("no cache", 0)
+        await _drive("cache", SESSIONS * 2)
+
+    asyncio.run(run())
+    analyzer.shutdown()
+    write_buffer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-frame state overhead of each backend, plus a cross-process atomicity check.
+
+Run from backend/:  python -m benchmarks.bench_state_backend
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+
+from app.services.session_store import SessionStore
+from app.services.state_backend import MemoryStateBackend, SQLiteStateBackend
+
+SESSIONS = 1000
+FRAMES = 20000
+WORKERS = 4
+INCREMENTS = 500
+
+
+def _frame(entry):
+    # Same shape of work as process_frame: claim, then apply rules
+    entry["last_frame_time"] = time.time()
+    entry["state"]["dark_frame_count"] += 1
+    return entry["state"]["total_violations"]
+
+
+def _percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def overhead(backend):
+    samples = []
+    for i in range(FRAMES):
+        t0 = time.perf_counter()
+        # Two read-modify-writes per analyzed frame
+        backend.update(i % SESSIONS, _frame)
+        backend.update(i % SESSIONS, _frame)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _increment(path, n):
+    backend = SQLiteStateBackend(path=path, local=SessionStore())
+
+    def bump(entry):
+        entry["state"]["total_violations"] += 1
+
+    for _ in range(n):
+        backend.update(1, bump)
+
+
+def atomicity(path):
+    procs = [multiprocessing.Process(target=_increment, args=(path, INCREMENTS)) for _ in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    backend = SQLiteStateBackend(path=path, local=SessionStore())
+    return backend.update(1, lambda entry: entry["state"]["total_violations"])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemoryStateBackend(local=SessionStore()),
+            "sqlite": SQLiteStateBackend(path=os.path.join(tmp, "bench.db"), local=SessionStore()),
+        }
+        for name, backend in backends.items():
+            samples = overhead(backend)
+            print(f"{name:>7} per frame  p50 {_percentile(samples, 0.5) * 1e6:7.1f} us"
+                  f"  p99 {_percentile(samples, 0.99) * 1e6:7.1f} us")
+
+        total = atomicity(os.path.join(tmp, "atomic.db"))
+        print(f"{WORKERS} processes x {INCREMENTS} increments -> {total} "
+              f"({'ok' if total == WORKERS * INCREMENTS else 'LOST UPDATES'})")
+
+
+if __name__ == "__main__":
+    main()
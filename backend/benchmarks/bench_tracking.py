@@ -0,0 +1,68 @@
+"""Face-region tracking vs full-frame cascade: time saved and agreement.
+
+Run from backend/:  python -m benchmarks.bench_tracking [RECORDED_DIR]
+
+RECORDED_DIR holds one subdirectory of frames per session. Without it a
+synthetic corpus is used, which has no real faces and so only exercises
+the full-scan fallback.
+"""
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from app.services.frame_analyzer import detect_faces, face_fields
+from app.services.face_tracker import FaceTracker
+from benchmarks.frames import jpeg_corpus, load_recorded
+
+
+def main(root=None):
+    if root:
+        sessions = load_recorded(root)
+    else:
+        sessions = {"synthetic": jpeg_corpus(100)}
+
+    tracker = FaceTracker()
+    full_time = tracked_time = 0.0
+    frames = same_count = same_presence = same_multi = 0
+
+    for session, blobs in sessions.items():
+        for data in blobs:
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                continue
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+            t0 = time.perf_counter()
+            full = len(detect_faces(gray))
+            t1 = time.perf_counter()
+            metrics = face_fields(gray, tracker.hint(session))
+            t2 = time.perf_counter()
+            tracker.update(session, metrics)
+
+            full_time += t1 - t0
+            tracked_time += t2 - t1
+            frames += 1
+            tracked = metrics["faces"]
+            same_count += tracked == full
+            same_presence += (tracked == 0) == (full == 0)
+            same_multi += (tracked > 1) == (full > 1)
+
+    if not frames:
+        print("no frames")
+        return
+
+    stats = tracker.stats()
+    print(f"frames                {frames}")
+    print(f"full-frame ms/frame   {1000 * full_time / frames:.3f}")
+    print(f"tracked ms/frame      {1000 * tracked_time / frames:.3f}")
+    print(f"saved ms/frame        {1000 * (full_time - tracked_time) / frames:.3f}")
+    print(f"roi scan ratio        {stats['roi_ratio']:.1%}")
+    print(f"face count agreement  {same_count / frames:.1%}")
+    print(f"no-face agreement     {same_presence / frames:.1%}")
+    print(f"multi-face agreement  {same_multi / frames:.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,69 @@
+"""Violation insert cost during a mass camera-dark event: a commit per row
+versus the write-behind buffer, on a throwaway SQLite database.
+
+Run from backend/:  python -m benchmarks.bench_write_buffer
+"""
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models_proctor import ProctorViolation
+from app.services.write_buffer import WriteBuffer
+
+VIOLATIONS = 5000
+SESSIONS = 500
+
+
+def _factory(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _count(factory):
+    db = factory()
+    try:
+        return db.query(ProctorViolation).count()
+    finally:
+        db.close()
+
+
+def per_row(factory):
+    t0 = time.perf_counter()
+    for i in range(VIOLATIONS):
+        db = factory()
+        db.add(ProctorViolation(session_id=i % SESSIONS + 1, violation_type="CAMERA_COVERED"))
+        db.commit()
+        db.close()
+    return time.perf_counter() - t0
+
+
+def buffered(factory):
+    buffer = WriteBuffer(session_factory=factory)
+    t0 = time.perf_counter()
+    for i in range(VIOLATIONS):
+        buffer.add_violation(i % SESSIONS + 1, "CAMERA_COVERED")
+    enqueue = time.perf_counter() - t0
+    buffer.stop()
+    return enqueue, time.perf_counter() - t0, buffer.stats()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = _factory(os.path.join(tmp, "direct.db"))
+        elapsed = per_row(direct)
+        print(f"commit per row  {elapsed * 1000:8.1f} ms  ({_count(direct)} rows)")
+
+        batched = _factory(os.path.join(tmp, "buffered.db"))
+        enqueue, total, stats = buffered(batched)
+        print(f"write-behind    {total * 1000:8.1f} ms  ({_count(batched)} rows)"
+              f"  enqueue {enqueue / VIOLATIONS * 1e6:.1f} us/row"
+              f"  {stats['flushes']} flushes, avg batch {stats['avg_batch']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+
+import cv2
+import numpy as np
+
+
+# ===================== SYNTHETIC FRAMES =====================
+def make_frame(seed, width=320, height=240):
+    """A webcam-like BGR frame: smooth gradient, a bright oval and sensor noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = (60 + 80 * x / width + 40 * y / height).astype(np.float32)
+    img = np.repeat(base[:, :, None], 3, axis=2)
+    cv2.ellipse(
+        img,
+        (int(width * rng.uniform(0.35, 0.65)), int(height * 0.45)),
+        (width // 8, height // 5),
+        0, 0, 360,
+        (150, 170, 200),
+        -1,
+    )
+    img += rng.normal(0, 6, img.shape).astype(np.float32)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _draw_face(img, center, size):
+    """A crude face: skin oval, dark eyes and mouth, enough Haar-like contrast."""
+    cx, cy = center
+    w, h = size
+    cv2.ellipse(img, (cx, cy), (w, h), 0, 0, 360, (150, 170, 200), -1)
+    for dx in (-w // 2, w // 2):
+        cv2.ellipse(img, (cx + dx, cy - h // 4), (max(1, w // 5), max(1, h // 10)), 0, 0, 360, (40, 40, 50), -1)
+    cv2.ellipse(img, (cx, cy + h // 2), (max(1, w // 3), max(1, h // 10)), 0, 0, 360, (60, 50, 90), -1)
+
+
+SCENES = ("normal", "dark", "blank", "multi", "replay")
+
+
+def make_scene(kind, seed, width=320, height=240):
+    """One frame of a named scenario.
+
+    normal: make_frame; dark: a covered camera; blank: a flat gray frame
+    (no detail, no motion); multi: two faces side by side; replay: the same
+    frame whatever the seed, like a looped photo.
+    """
+    if kind == "normal":
+        return make_frame(seed, width, height)
+    if kind == "replay":
+        return make_frame(0, width, height)
+    if kind == "dark":
+        rng = np.random.default_rng(seed)
+        return np.clip(rng.normal(4, 2, (height, width, 3)), 0, 255).astype(np.uint8)
+    if kind == "blank":
+        return np.full((height, width, 3), 128, np.uint8)
+    if kind == "multi":
+        img = make_frame(seed, width, height)
+        for fx in (0.3, 0.7):
+            _draw_face(img, (int(width * fx), int(height * 0.45)), (width // 10, height // 6))
+        return img
+    raise ValueError(f"Unknown scene: {kind}")
+
+
+def encode(img, quality=70):
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    return buf.tobytes()
+
+
+def jpeg_corpus(count, width=320, height=240, quality=70):
+    return [encode(make_frame(i, width, height), quality) for i in range(count)]
+
+
+# ===================== RECORDED FRAMES =====================
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def load_recorded(root):
+    """Recorded frames as {session: [jpeg bytes, ...]}.
+
+    Each subdirectory of root is one session, frames in filename order.
+    Images directly under root form a single session.
+    """
+    sessions = {}
+    for dirpath, _, filenames in sorted(os.walk(root)):
+        frames = []
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    frames.append(f.read())
+        if frames:
+            sessions[os.path.relpath(dirpath, root)] = frames
+    return sessions
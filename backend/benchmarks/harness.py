@@ -0,0 +1,237 @@
+"""End-to-end proctoring benchmark: the real frame path over a corpus.
+
+Drives app.routes.proctor.process_frame (decode, stages, face detection,
+rules and state update, violation write) for many concurrent sessions
+against a throwaway SQLite database. The corpus mixes synthetic scenes
+(normal, dark, blank, two faces, static replay) at several resolutions and
+JPEG qualities, plus an optional directory of recorded frames laid out as
+benchmarks.frames.load_recorded expects.
+
+Reports per-stage p50/p95/p99, frames/s per core and memory per session,
+and can write the results as JSON and compare them with an earlier run:
+
+    python -m benchmarks.harness --out before.json
+    python -m benchmarks.harness --out after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RESOLUTIONS = ((320, 240), (640, 480), (1280, 720))
+QUALITIES = (50, 80)
+FRAMES_PER_STREAM = 6
+MEMORY_SESSIONS = 200
+
+
+# ===================== CORPUS =====================
+def build_corpus(recorded=None):
+    """Frame streams as [(label, [jpeg bytes, ...])]; each stream is one session's camera."""
+    from benchmarks.frames import SCENES, encode, load_recorded, make_scene
+
+    streams = []
+    for kind in SCENES:
+        for width, height in RESOLUTIONS:
+            for quality in QUALITIES:
+                frames = [
+                    encode(make_scene(kind, seed, width, height), quality)
+                    for seed in range(FRAMES_PER_STREAM)
+                ]
+                streams.append((f"{kind}/{width}x{height}/q{quality}", frames))
+    if recorded:
+        for name, frames in load_recorded(recorded).items():
+            streams.append((f"recorded/{name}", frames))
+    return streams
+
+
+# ===================== INSTRUMENTATION =====================
+def _percentiles(samples):
+    if not samples:
+        return {"runs": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000.0
+    return {"runs": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def _timed(samples, fn):
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - t0)
+    return wrapper
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ===================== RUN =====================
+async def _run(streams, sessions, rounds):
+    from app import models_proctor
+    from app.database import Base, SessionLocal, engine
+    from app.routes import proctor
+    from app.services.evidence_store import evidence_store
+    from app.services.frame_analyzer import analyzer, stage_stats
+    from app.services.session_store import sessions as session_store
+    from app.services.state_backend import state_backend
+    from app.services.write_buffer import write_buffer
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    session_ids = []
+    for i in range(sessions):
+        row = models_proctor.ProctorSession(exam_id=1, user_id=i + 1)
+        db.add(row)
+        db.flush()
+        db.add(models_proctor.ProctorSessionScore(
+            session_id=row.id, penalty_total=0, violation_count=0, type_counts="{}"
+        ))
+        session_ids.append(row.id)
+    db.commit()
+
+    # Instrument the shared singletons the frame path goes through
+    state_samples, write_samples, frame_samples, by_scene = [], [], [], {}
+    raw_update = state_backend.update
+    state_backend.update = _timed(state_samples, state_backend.update)
+    write_buffer.add_violation = _timed(write_samples, write_buffer.add_violation)
+    stage_stats.keep_samples = True
+
+    def reset_rate_limit(entry):
+        entry["last_frame_time"] = 0
+
+    async def one(session_id, stream, frame_index, record=True):
+        label, frames = streams[stream]
+        # Every call is a fresh frame; the 2 s per-session limit would skip it
+        raw_update(session_id, reset_rate_limit)
+        t0 = time.perf_counter()
+        await proctor.process_frame(session_id, 1, frames[frame_index % len(frames)], db)
+        if record:
+            seconds = time.perf_counter() - t0
+            frame_samples.append(seconds)
+            by_scene.setdefault(label.split("/")[0], []).append(seconds)
+
+    t0 = time.perf_counter()
+    for r in range(rounds):
+        await asyncio.gather(*(
+            one(sid, i % len(streams), r) for i, sid in enumerate(session_ids)
+        ))
+    wall = time.perf_counter() - t0
+
+    t_flush = time.perf_counter()
+    write_buffer.flush()
+    flush_ms = (time.perf_counter() - t_flush) * 1000.0
+    stages = {stage: _percentiles(samples) for stage, samples in stage_stats.samples.items()}
+    stages["state"] = _percentiles(state_samples)
+    stages["violation_write"] = _percentiles(write_samples)
+    stages["frame"] = _percentiles(frame_samples)
+
+    # Memory: fresh sessions under tracemalloc, a few frames each
+    for sid in session_ids:
+        session_store.end(sid)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    memory_ids = session_ids[:min(MEMORY_SESSIONS, sessions)]
+    for r in range(3):
+        await asyncio.gather(*(
+            one(sid, i % len(streams), r, record=False) for i, sid in enumerate(memory_ids)
+        ))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    frames = sessions * rounds
+
+    db.close()
+    analyzer.shutdown()
+    evidence_store.stop()
+    write_buffer.stop()
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {
+            "sessions": sessions,
+            "rounds": rounds,
+            "streams": len(streams),
+            "workers": analyzer.workers,
+        },
+        "frames": frames,
+        "fps": frames / wall,
+        "fps_per_core": frames / wall / analyzer.workers,
+        "memory_per_session_bytes": (after - before) / len(memory_ids),
+        "violation_flush_ms": flush_ms,
+        "exits": dict(stage_stats.exits),
+        "stages": stages,
+        "by_scene": {scene: _percentiles(samples) for scene, samples in by_scene.items()},
+    }
+
+
+# ===================== REPORT =====================
+def print_report(results, baseline=None):
+    print(f"commit {results['commit']}  {results['frames']} frames, "
+          f"{results['config']['sessions']} sessions, {results['config']['workers']} workers")
+    print(f"{'stage':>16} {'runs':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          + (f" {'Δp50':>8} {'Δp99':>8}" if baseline else ""))
+    for name, row in list(results["stages"].items()) + list(results["by_scene"].items()):
+        if name in results["by_scene"] and name == next(iter(results["by_scene"])):
+            print(f"{'scene':>16}")
+        line = f"{name:>16} {row['runs']:>7} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f}"
+        old = baseline and (baseline["stages"].get(name) or baseline["by_scene"].get(name))
+        if old and old["p50_ms"] and old["p99_ms"]:
+            line += (f" {100 * (row['p50_ms'] / old['p50_ms'] - 1):>+7.1f}%"
+                     f" {100 * (row['p99_ms'] / old['p99_ms'] - 1):>+7.1f}%")
+        print(line)
+    print(f"frames/s {results['fps']:.1f}  per core {results['fps_per_core']:.1f}"
+          + (f"  ({100 * (results['fps'] / baseline['fps'] - 1):+.1f}%)" if baseline else ""))
+    print(f"memory per session {results['memory_per_session_bytes'] / 1024:.1f} KiB"
+          f"  violation flush {results['violation_flush_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proctoring frame-path benchmark")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--recorded", help="directory of recorded frames")
+    parser.add_argument("--out", help="write results as JSON here")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="proctor-bench-") as tmp:
+        # Before any app import: the app reads these at import time. Every
+        # file the app would write goes to tmp, not the working directory.
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["PROCTOR_STATE_DB"] = os.path.join(tmp, "proctor_state.db")
+        os.environ["PROCTOR_EVENT_DB"] = os.path.join(tmp, "proctor_events.db")
+        os.environ["PROCTOR_EVIDENCE_DIR"] = os.path.join(tmp, "proctor_evidence")
+        os.environ.setdefault("PROCTOR_STATE_BACKEND", "memory")
+        os.environ.setdefault("PROCTOR_ANALYZER_QUEUE_DEPTH", str(max(args.sessions, 64)))
+
+        streams = build_corpus(args.recorded)
+        results = asyncio.run(_run(streams, args.sessions, args.rounds))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
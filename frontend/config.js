@@ -33,10 +33,14 @@ const API_CONFIG = {
         // Proctoring
         PROCTOR_START: '/proctor/start',
         PROCTOR_FRAME: '/proctor/frame',
+        PROCTOR_END: '/proctor/end',
+        PROCTOR_EVENTS: '/proctor/events',
         PROCTOR_ADMIN_REPORT: (examId) => `/proctor/admin/report/${examId}`,
+        PROCTOR_DASHBOARD: '/proctor/admin/dashboard',
         
         // WebSocket
-        WS_ADMIN: '/ws/admin'
+        WS_ADMIN: '/ws/admin',
+        WS_PROCTOR: (sessionId) => `/ws/proctor/${sessionId}`
     }
 };
 